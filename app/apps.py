@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class MainAppConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'app'
+
+    def ready(self):
+        import app.signals
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+
+from app.models import DashboardGeneration
+
+GENERATION_PK = 1
+HITS_KEY = 'dashboard:hits'
+MISSES_KEY = 'dashboard:misses'
+
+
+def _cache():
+    # Backend configurável (locmem, arquivo, banco...) via settings.CACHES. As
+    # entradas podem ficar por processo: a geração que as invalida está no banco.
+    # Os contadores de acertos/falhas são do backend (por processo no locmem).
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _incr(key):
+    cache = _cache()
+    try:
+        return cache.incr(key)
+    except ValueError:  # chave ainda não existe (ou expirou)
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+# -------------------------
+# Contador de geração (no banco): qualquer escrita relevante invalida todas
+# as entradas, em todos os processos
+# -------------------------
+def current_generation():
+    generation = DashboardGeneration.objects.filter(pk=GENERATION_PK).values_list('generation', flat=True).first()
+    if generation is None:
+        generation = DashboardGeneration.objects.get_or_create(pk=GENERATION_PK)[0].generation
+    return generation
+
+
+def bump_generation():
+    """Invalida todas as entradas do cache do dashboard."""
+    if not DashboardGeneration.objects.filter(pk=GENERATION_PK).update(generation=F('generation') + 1):
+        DashboardGeneration.objects.get_or_create(pk=GENERATION_PK, defaults={'generation': 2})
+
+
+# -------------------------
+# Leitura com cálculo sob demanda
+# -------------------------
+def get_or_compute(data_inicio, data_fim, compute):
+    """
+    Retorna o contexto do dashboard para o período, calculando-o com
+    `compute()` só quando não existe entrada para a geração atual.
+    """
+    cache = _cache()
+    key = f'dashboard:{current_generation()}:{data_inicio:%Y-%m-%d}:{data_fim:%Y-%m-%d}'
+
+    contexto = cache.get(key)
+    if contexto is not None:
+        _incr(HITS_KEY)
+        return contexto
+
+    _incr(MISSES_KEY)
+    contexto = compute()
+    cache.set(key, contexto, timeout=getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+    return contexto
+
+
+def stats():
+    cache = _cache()
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'generation': current_generation(),
+    }
@@ -1,17 +1,15 @@
 from django.utils.formats import number_format
-from products.models import Product
+from products.totals import get_totals
 
 def get_product_metrics():
-    products = Product.objects.all()
-    total_cost_price = sum(product.cost_price * product.quantity for  product in products)
-    total_selling_price = sum(product.selling_price * product.quantity for  product in products)
-    total_quantity = sum(product.quantity for  product in products)
-    total_profit = total_selling_price - total_cost_price
+    # Totais mantidos por delta (products.totals): leitura O(1)
+    totals = get_totals()
+    total_profit = totals.total_selling_value - totals.total_cost_value
 
     return dict(
-        total_cost_price = number_format(total_cost_price, decimal_pos=2, force_grouping=True),
-        total_selling_price = number_format(total_selling_price, decimal_pos=2, force_grouping=True),
-        total_quantity = total_quantity,
+        total_cost_price = number_format(totals.total_cost_value, decimal_pos=2, force_grouping=True),
+        total_selling_price = number_format(totals.total_selling_value, decimal_pos=2, force_grouping=True),
+        total_quantity = totals.total_quantity,
         total_profit = number_format(total_profit, decimal_pos=2, force_grouping=True),
 
     )
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def create_generation_row(apps, schema_editor):
+    DashboardGeneration = apps.get_model('app', 'DashboardGeneration')
+    DashboardGeneration.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.BigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_generation_row, migrations.RunPython.noop),
+    ]
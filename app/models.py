@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class DashboardGeneration(models.Model):
+    """
+    Geração do cache do dashboard (linha única). Fica no banco para que uma
+    escrita em qualquer processo (workers do gunicorn, run_forecast_worker)
+    invalide o cache de todos, mesmo com um backend de cache local.
+    """
+    generation = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Geração {self.generation} do dashboard"
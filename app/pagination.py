@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+
+
+# -------------------------
+# Paginação por cursor (keyset) das APIs de listagem
+# -------------------------
+class IdCursorPagination(CursorPagination):
+    """
+    Página por cursor opaco (?cursor=...), ordenada pela chave primária: cada
+    página é um WHERE id < último visto + LIMIT, então a página 1000 custa o
+    mesmo que a primeira. O tamanho vem de ?limit=, até API_MAX_PAGE_SIZE.
+    """
+    ordering = '-id'
+    page_size_query_param = 'limit'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 1000)
+
+
+class CreatedAtCursorPagination(IdCursorPagination):
+    """
+    Para movimentações (entradas/saídas): mais recentes primeiro. O cursor
+    guarda (created_at, id) e cada página filtra pela tupla:
+    created_at < c OR (created_at = c AND id < i). O CursorPagination do DRF
+    compara só o primeiro campo e desempata com OFFSET, que volta a varrer
+    linhas quando muitas saídas têm o mesmo created_at (importações em lote).
+    Depende dos índices (-created_at, -id) das tabelas.
+    """
+    ordering = ('-created_at', '-id')
+
+    def _keyset(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor, None
+        created_at, _, pk = cursor.position.rpartition('|')
+        created_at = parse_datetime(created_at)
+        if created_at is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return cursor, (created_at, int(pk))
+
+    def decode_cursor(self, request):
+        # A posição já foi aplicada como tupla em paginate_queryset: o DRF
+        # recebe o cursor sem ela (e sem o filtro só por created_at)
+        cursor, _ = self._keyset(request)
+        return cursor._replace(position=None) if cursor else None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor, keyset = self._keyset(request)
+        if keyset:
+            created_at, pk = keyset
+            if cursor.reverse:  # página anterior: itens mais novos que a posição
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+        page = super().paginate_queryset(queryset, request, view)
+
+        # O que o DRF faria com a posição do cursor atual
+        if keyset:
+            if cursor.reverse:
+                self.has_next, self.next_position = True, cursor.position
+            else:
+                self.has_previous, self.previous_position = True, cursor.position
+        return page
+
+    def _get_position_from_instance(self, instance, ordering):
+        if isinstance(instance, dict):
+            return f"{instance['created_at'].isoformat()}|{instance['id']}"
+        return f"{instance.created_at.isoformat()}|{instance.pk}"
@@ -71,6 +71,7 @@ STATICFILES_DIRS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'app.sql_instrumentation.SQLInstrumentationMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -148,6 +149,52 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LocMemCache é por processo: sozinho não serve para invalidar o dashboard
+# entre workers. Por isso a geração do dashboard fica no banco
+# (app.models.DashboardGeneration) e o cache guarda só as entradas; para
+# também compartilhar as entradas use FileBasedCache, DatabaseCache ou Redis.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+DASHBOARD_CACHE_ALIAS = 'default'
+DASHBOARD_CACHE_TIMEOUT = 300  # segundos
+
+
+# Totais do estoque: linhas somadas na leitura; cada produto atualiza sempre a
+# mesma linha (pk % shards), então saídas de produtos diferentes não disputam a trava
+
+INVENTORY_TOTALS_SHARDS = 16
+
+
+# Previsão: treino segmentado (None = modelo global único; 'category' ou 'brand')
+
+FORECAST_SEGMENT_BY = None
+FORECAST_MIN_SEGMENT_PRODUCTS = 50  # segmentos menores usam o modelo global
+FORECAST_TUNING_BUDGET_SECONDS = 300  # limite da busca de hiperparâmetros
+FORECAST_PREDICT_MAX_PRODUCTS = 5000  # produtos por chamada da API de predição
+FORECAST_PREDICT_MAX_HORIZON = 90  # dias
+FORECAST_PREDICT_CACHE_SECONDS = 300  # validade das previsões em cache da API
+FORECAST_JOB_HEARTBEAT_TIMEOUT = 300  # segundos sem sinal do worker até o job 'running' ser recuperado
+FORECAST_JOB_MAX_ATTEMPTS = 2  # reservas de um job antes de ser marcado como falho
+
+
+# Instrumentação de SQL por requisição (desligada por padrão)
+# Liga com SQL_INSTRUMENTATION=1 no ambiente; cabeçalho Server-Timing + amostra em JSONL.
+
+SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION') == '1'
+SQL_INSTRUMENTATION_LOG = BASE_DIR / 'logs' / 'sql_requests.jsonl'
+SQL_INSTRUMENTATION_LOG_MAX_BYTES = 10 * 1024 * 1024
+SQL_INSTRUMENTATION_SAMPLE_RATE = 1.0  # fração das requisições gravadas no log
+SQL_INSTRUMENTATION_SLOWEST = 5  # consultas mais lentas guardadas por requisição
+SQL_INSTRUMENTATION_STACK_THRESHOLD = 50  # acima disso, registra a pilha (suspeita de N+1)
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -168,8 +215,13 @@ REST_FRAMEWORK = {
             'rest_framework.permissions.IsAuthenticated',
              'rest_framework.permissions.DjangoModelPermissions',
         ),
+        # Listagens paginadas por cursor (ver app/pagination.py)
+        'DEFAULT_PAGINATION_CLASS': 'app.pagination.IdCursorPagination',
+        'PAGE_SIZE': 100,
 }
 
+API_MAX_PAGE_SIZE = 1000  # maior ?limit= aceito pelas listagens da API
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
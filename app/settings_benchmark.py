@@ -0,0 +1,16 @@
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+# Settings dos benchmarks: run_forecast_benchmark grava lojas sintéticas
+# inteiras e trava as linhas de InventoryTotals enquanto mede, e
+# benchmark_outflow_concurrency cria saídas e baixa estoque de verdade. Rodam só
+# em uma base própria, nunca na base da loja.
+#   python manage.py run_forecast_benchmark --settings=app.settings_benchmark
+#   python manage.py benchmark_outflow_concurrency <produto> --settings=app.settings_benchmark
+DATABASES = {
+    'default': dict(DATABASES['default'], NAME=os.environ.get('FORECAST_BENCHMARK_DB', 'estoque_benchmark')),
+}
+
+FORECAST_BENCHMARK = True
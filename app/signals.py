@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from products.models import Product
+from inflows.models import Inflow
+from outflows.models import Outflow
+from app.dashboard_cache import bump_generation
+
+# -------------------------
+# Invalida o cache do dashboard em escritas de produtos, entradas e saídas
+# -------------------------
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Inflow)
+@receiver([post_save, post_delete], sender=Outflow)
+def invalidate_dashboard_cache(sender, **kwargs):
+    # Só depois do commit: antes disso uma leitura concorrente ainda vê os dados
+    # antigos e os guardaria sob a geração nova
+    transaction.on_commit(bump_generation)
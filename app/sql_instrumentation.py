@@ -0,0 +1,151 @@
+import heapq
+import json
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SQL_MAX_LENGTH = 500
+
+
+def _setting(name, default):
+    return getattr(settings, f'SQL_INSTRUMENTATION_{name}', default)
+
+
+def project_stack():
+    """Pilha atual só com os quadros do projeto (sem Django/bibliotecas)."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(base_dir) and 'site-packages' not in frame.filename
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+# -------------------------
+# Coleta das consultas de uma requisição (via connection.execute_wrapper)
+# -------------------------
+class QueryRecorder:
+    def __init__(self, slowest=5, stack_threshold=None):
+        self.count = 0
+        self.seconds = 0.0
+        self.slowest = []  # heap mínimo com as `slowest_size` consultas mais lentas
+        self.slowest_size = slowest
+        self.stack_threshold = stack_threshold
+        self.stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.seconds += duration
+
+            entry = (duration, self.count, sql[:SQL_MAX_LENGTH])
+            if len(self.slowest) < self.slowest_size:
+                heapq.heappush(self.slowest, entry)
+            elif self.slowest and duration > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+            # pilha da consulta que ultrapassou o limite (aponta o laço N+1)
+            if self.stack is None and self.stack_threshold and self.count > self.stack_threshold:
+                self.stack = project_stack()
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(duration * 1000, 2), 'position': position, 'sql': sql}
+            for duration, position, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+# -------------------------
+# Log JSONL com rotação por tamanho
+# -------------------------
+_log_lock = threading.Lock()
+
+
+def write_sample(path, record, max_bytes):
+    line = json.dumps(record, default=str) + '\n'
+    with _log_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if max_bytes and os.path.exists(path) and os.path.getsize(path) + len(line) > max_bytes:
+            os.replace(path, f'{path}.1')  # mantém só o arquivo anterior
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+# -------------------------
+# Middleware (opcional: SQL_INSTRUMENTATION = True)
+# -------------------------
+class SQLInstrumentationMiddleware:
+    """
+    Mede, por requisição, quantidade de consultas, tempo total de SQL e as
+    consultas mais lentas. Expõe os números no cabeçalho Server-Timing, grava
+    uma amostra em JSONL e registra a pilha quando a requisição passa de
+    SQL_INSTRUMENTATION_STACK_THRESHOLD consultas.
+
+    Consultas feitas durante o envio de respostas em streaming não entram na
+    medição (acontecem depois que a view retorna).
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slowest = _setting('SLOWEST', 5)
+        self.stack_threshold = _setting('STACK_THRESHOLD', 50)
+        self.sample_rate = _setting('SAMPLE_RATE', 1.0)
+        self.log_path = _setting('LOG', None)
+        self.log_max_bytes = _setting('LOG_MAX_BYTES', 10 * 1024 * 1024)
+
+    def __call__(self, request):
+        recorder = QueryRecorder(self.slowest, self.stack_threshold)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        slowest = recorder.slowest_queries()
+        timings = [
+            f'db;dur={recorder.seconds * 1000:.2f};desc="SQL ({recorder.count} consultas)"',
+            f'app;dur={elapsed * 1000:.2f}',
+        ]
+        if slowest:
+            timings.append(f'db-slowest;dur={slowest[0]["ms"]:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if recorder.stack:
+            logger.warning(
+                "%s %s fez %d consultas (limite %d). Pilha da consulta %d:\n%s",
+                request.method, request.path, recorder.count, self.stack_threshold,
+                self.stack_threshold + 1, recorder.stack,
+            )
+
+        if self.log_path and random.random() < self.sample_rate:
+            write_sample(self.log_path, {
+                'at': timezone.now().isoformat(),
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'ms': round(elapsed * 1000, 2),
+                'queries': recorder.count,
+                'sql_ms': round(recorder.seconds * 1000, 2),
+                'slowest': slowest,
+                'stack': recorder.stack,
+            }, self.log_max_bytes)
+
+        return response
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from app import dashboard_cache
+from app.models import DashboardGeneration
+from brands.models import Brands
+from categories.models import Category
+from outflows.models import DailyOutflowSummary, Outflow
+from products.models import Product
+
+
+class DashboardQueryCountTest(TestCase):
+    """O dashboard faz um número fixo de consultas, com e sem cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', password='admin')
+        category = Category.objects.create(name='Categoria')
+        brand = Brands.objects.create(name='Marca')
+        cls.end = date(2025, 3, 31)
+        for i in range(25):
+            product = Product.objects.create(
+                title=f'Produto {i}', category=category, brand=brand,
+                cost_price=10, selling_price=15, quantity=i,
+            )
+            for day in range(0, 120, 2):
+                DailyOutflowSummary.objects.create(
+                    product=product, date=cls.end - timedelta(days=day), qty=1, promo_qty=0, count=1,
+                )
+
+    def setUp(self):
+        dashboard_cache.bump_generation()  # nenhuma entrada de outro teste vale aqui
+        self.client.force_login(self.user)
+
+    def _get(self, days):
+        return self.client.get(reverse('home'), {
+            'data_inicio': (self.end - timedelta(days=days - 1)).isoformat(),
+            'data_fim': self.end.isoformat(),
+        })
+
+    def test_uncached_query_count_does_not_depend_on_the_period(self):
+        for days in (7, 60):
+            with self.subTest(days=days), self.assertNumQueries(8):
+                response = self._get(days)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['total_produtos'], 25)
+
+    def test_cached_render_only_loads_the_session_and_generation(self):
+        self._get(30)
+        hits = dashboard_cache.stats()['hits']
+        with self.assertNumQueries(3):
+            response = self._get(30)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(dashboard_cache.stats()['hits'], hits + 1)
+
+    def test_generation_bumped_by_another_process_invalidates_local_entries(self):
+        self._get(30)
+        misses = dashboard_cache.stats()['misses']
+        # outro processo só enxerga o banco: o cache local deste não é tocado
+        DashboardGeneration.objects.filter(pk=dashboard_cache.GENERATION_PK).update(generation=F('generation') + 1)
+        self._get(30)
+        self.assertEqual(dashboard_cache.stats()['misses'], misses + 1)
+
+
+class CreatedAtCursorPaginationTest(TestCase):
+    """Saídas com o mesmo created_at são paginadas pela tupla (created_at, id), sem OFFSET."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', password='admin')
+        product = Product.objects.create(
+            title='Produto', category=Category.objects.create(name='Categoria'),
+            brand=Brands.objects.create(name='Marca'), cost_price=10, selling_price=15, quantity=1000,
+        )
+        outflows = [Outflow.objects.create(product=product, quantity=1) for _ in range(30)]
+        # importação em lote: todas no mesmo instante, exceto a mais antiga
+        same = timezone.now()
+        Outflow.objects.filter(pk__in=[o.pk for o in outflows[1:]]).update(created_at=same)
+        Outflow.objects.filter(pk=outflows[0].pk).update(created_at=same - timedelta(days=1))
+        cls.expected = [o.pk for o in reversed(outflows)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_forward_and_back_without_offset(self):
+        pages, url = [], reverse('outflow-create-list-api-view') + '?limit=7'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).json()
+                pages.append([item['id'] for item in data['results']])
+                url = data['next']
+        self.assertEqual([pk for page in pages for pk in page], self.expected)
+        self.assertFalse([q for q in queries if 'OFFSET' in q['sql'].upper()])
+
+        previous = self.client.get(data['previous']).json()
+        self.assertEqual([item['id'] for item in previous['results']], pages[-2])
@@ -13,6 +13,7 @@ urlpatterns = [
     
     # Dashboard / página inicial
     path('', views.home, name='home'),
+    path('dashboard/cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
 
     # Rotas dos apps com prefixos
     path('brands/', include('brands.urls')),
@@ -1,11 +1,16 @@
 from django.shortcuts import render
+from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, F, Q, FloatField
+from django.db.models import Count, Sum, F, Q, FloatField
 from django.db.models.functions import Coalesce, TruncMonth
-from datetime import datetime, timedelta
+from django.utils import timezone
+from datetime import datetime, time, timedelta
 from products.models import Product
-from outflows.models import Outflow
+from outflows.models import Outflow, DailyOutflowSummary
 import json
+import numpy as np
+
+from app import dashboard_cache
 
 @login_required(login_url='login')
 def home(request):
@@ -26,66 +31,35 @@ def home(request):
         data_fim = datetime.now().date()
         data_inicio = data_fim - timedelta(days=30)
 
-    # --------------------------------------------
-    # Coleta de dados de produtos e saídas
-    # --------------------------------------------
-    produtos = Product.objects.all()
-    outflows = Outflow.objects.filter(created_at__range=[data_inicio, data_fim])
+    # Resultado em cache por período; invalidado por escritas em produtos/entradas/saídas
+    contexto = dashboard_cache.get_or_compute(
+        data_inicio, data_fim, lambda: build_dashboard_context(data_inicio, data_fim)
+    )
+    return render(request, "dashboard.html", contexto)
+
 
+def build_dashboard_context(data_inicio, data_fim):
     # --------------------------------------------
-    # Cálculos principais (respeitando o filtro)
+    # Agregados de produtos (uma consulta)
     # --------------------------------------------
-    total_produtos = produtos.count()
-
-    custo_estoque = produtos.aggregate(
-        total=Coalesce(Sum(F("quantity") * F("cost_price"), output_field=FloatField()), 0.0)
-    )["total"]
-
-    valor_estoque = produtos.aggregate(
-        total=Coalesce(Sum(F("quantity") * F("selling_price"), output_field=FloatField()), 0.0)
-    )["total"]
-
-    lucro_estoque = valor_estoque - custo_estoque
-
-    produtos_risco = produtos.annotate(
-        qtd_vendida=Coalesce(
-            Sum(
-                "outflows__quantity",
-                filter=Q(outflows__created_at__range=[data_inicio, data_fim]),
-            ),
-            0,
-        )
-    ).filter(qtd_vendida__gt=F("quantity")).count()
-
-    promo_impact = 12.5  # Valor ilustrativo (poderá ser dinâmico futuramente)
-
-    last_update = outflows.order_by("-created_at").first()
-    last_update = last_update.created_at.strftime("%d/%m/%Y %H:%M") if last_update else "-"
-
-    periodo_anterior_inicio = data_inicio - (data_fim - data_inicio)
-    periodo_anterior_fim = data_inicio
-
-    vendas_atual = outflows.aggregate(total=Coalesce(Sum("quantity"), 0))["total"]
-    vendas_anterior = Outflow.objects.filter(
-        created_at__range=[periodo_anterior_inicio, periodo_anterior_fim]
-    ).aggregate(total=Coalesce(Sum("quantity"), 0))["total"]
-
-    monthly_growth = (
-        round(((vendas_atual - vendas_anterior) / vendas_anterior) * 100, 2)
-        if vendas_anterior > 0
-        else 0
+    totais = Product.objects.aggregate(
+        total_produtos=Count("id"),
+        custo_estoque=Coalesce(Sum(F("quantity") * F("cost_price"), output_field=FloatField()), 0.0),
+        valor_estoque=Coalesce(Sum(F("quantity") * F("selling_price"), output_field=FloatField()), 0.0),
     )
+    total_produtos = totais["total_produtos"]
+    custo_estoque = totais["custo_estoque"]
+    valor_estoque = totais["valor_estoque"]
+    lucro_estoque = valor_estoque - custo_estoque
 
     # --------------------------------------------
-    # Top produtos e gráficos dinâmicos
+    # Quantidade vendida no período por produto (uma consulta), reaproveitada
+    # para risco, top 20 e top 10
     # --------------------------------------------
-    top_produtos = (
-        produtos.annotate(
+    vendidos = list(
+        Product.objects.annotate(
             qtd_vendida=Coalesce(
-                Sum(
-                    "outflows__quantity",
-                    filter=Q(outflows__created_at__range=[data_inicio, data_fim]),
-                ),
+                Sum("daily_outflows__qty", filter=Q(daily_outflows__date__range=[data_inicio, data_fim])),
                 0,
             ),
             lucro_estimado=Coalesce(
@@ -94,15 +68,55 @@ def home(request):
                 output_field=FloatField(),
             ),
         )
-        .order_by("-qtd_vendida")[:20]
+        .values("id", "title", "quantity", "qtd_vendida", "lucro_estimado")
+        .order_by("title")
+    )
+    qtd_vendida = np.fromiter((p["qtd_vendida"] for p in vendidos), dtype=np.int64, count=len(vendidos))
+    estoque = np.fromiter((p["quantity"] for p in vendidos), dtype=np.int64, count=len(vendidos))
+
+    produtos_risco = int(np.count_nonzero(qtd_vendida > estoque))
+
+    # Ordena por quantidade vendida (desc); empates ficam em ordem alfabética
+    ranking = np.argsort(-qtd_vendida, kind="stable")
+    top_produtos = [vendidos[i] for i in ranking[:20]]
+    produtos_mais_vendidos = top_produtos[:10]
+
+    promo_impact = 12.5  # Valor ilustrativo (poderá ser dinâmico futuramente)
+
+    inicio_dt = timezone.make_aware(datetime.combine(data_inicio, time.min))
+    fim_dt = timezone.make_aware(datetime.combine(data_fim + timedelta(days=1), time.min))
+    last_update = Outflow.objects.filter(
+        created_at__gte=inicio_dt, created_at__lt=fim_dt
+    ).order_by("-created_at").first()
+    last_update = timezone.localtime(last_update.created_at).strftime("%d/%m/%Y %H:%M") if last_update else "-"
+
+    # --------------------------------------------
+    # Vendas do período atual e do anterior (uma consulta)
+    # --------------------------------------------
+    # Período anterior com o mesmo número de dias do atual (data_fim inclusive)
+    periodo_anterior_inicio = data_inicio - ((data_fim - data_inicio) + timedelta(days=1))
+
+    vendas = DailyOutflowSummary.objects.filter(
+        date__range=[periodo_anterior_inicio, data_fim]
+    ).aggregate(
+        atual=Coalesce(Sum("qty", filter=Q(date__gte=data_inicio)), 0),
+        anterior=Coalesce(Sum("qty", filter=Q(date__lt=data_inicio)), 0),
+    )
+    vendas_atual = vendas["atual"]
+    vendas_anterior = vendas["anterior"]
+
+    monthly_growth = (
+        round(((vendas_atual - vendas_anterior) / vendas_anterior) * 100, 2)
+        if vendas_anterior > 0
+        else 0
     )
 
     # 🔹 Gráfico 1 – Tendência Mensal de Vendas (filtra por intervalo)
     vendas_mensais = (
-        Outflow.objects.filter(created_at__range=[data_inicio, data_fim])
-        .annotate(mes=TruncMonth("created_at"))
+        DailyOutflowSummary.objects.filter(date__range=[data_inicio, data_fim])
+        .annotate(mes=TruncMonth("date"))
         .values("mes")
-        .annotate(total_vendas=Coalesce(Sum("quantity"), 0))
+        .annotate(total_vendas=Coalesce(Sum("qty"), 0))
         .order_by("mes")
     )
 
@@ -110,21 +124,8 @@ def home(request):
     valores_vendas = [float(v["total_vendas"]) for v in vendas_mensais]
 
     # 🔹 Gráfico 2 – Top 10 produtos mais vendidos (filtra por intervalo)
-    produtos_mais_vendidos = (
-        produtos.annotate(
-            qtd_vendida=Coalesce(
-                Sum(
-                    "outflows__quantity",
-                    filter=Q(outflows__created_at__range=[data_inicio, data_fim]),
-                ),
-                0,
-            )
-        )
-        .order_by("-qtd_vendida")[:10]
-    )
-
-    labels_produtos = [p.title for p in produtos_mais_vendidos]
-    valores_produtos = [float(p.qtd_vendida) for p in produtos_mais_vendidos]
+    labels_produtos = [p["title"] for p in produtos_mais_vendidos]
+    valores_produtos = [float(p["qtd_vendida"]) for p in produtos_mais_vendidos]
 
     # --------------------------------------------
     # Contexto enviado ao template
@@ -147,4 +148,9 @@ def home(request):
         "valores_produtos": json.dumps(valores_produtos),
     }
 
-    return render(request, "dashboard.html", contexto)
+    return contexto
+
+
+@login_required(login_url='login')
+def dashboard_cache_stats(request):
+    return JsonResponse(dashboard_cache.stats())
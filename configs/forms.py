@@ -1,5 +1,9 @@
 # configs/forms.py
+from datetime import timedelta
+
+import numpy as np
 from django import forms
+from forecast.timeseries import TRAIN_HORIZON, horizon_from_origin
 from .models import ForecastConfig
 
 class ForecastConfigForm(forms.ModelForm):
@@ -31,3 +35,19 @@ class ForecastConfigForm(forms.ModelForm):
             'start_date': 'Data base para início das previsões.',
             'forecast_horizon': 'Número de dias para prever.',
         }
+
+    def clean(self):
+        # O modelo só aprende horizontes de até TRAIN_HORIZON dias após a origem.
+        # A origem é ontem quando start_date está no futuro: mesma conta do pipeline.
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        horizon = cleaned_data.get('forecast_horizon')
+        if start_date and horizon:
+            dates = np.array([start_date, start_date + timedelta(days=horizon - 1)], dtype='datetime64[D]')
+            span = horizon_from_origin(dates)
+            if span > TRAIN_HORIZON:
+                self.add_error('forecast_horizon', forms.ValidationError(
+                    f'A última data prevista ficaria a {span} dias de hoje; '
+                    f'o máximo é {TRAIN_HORIZON} dias.'
+                ))
+        return cleaned_data
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from forecast.timeseries import TRAIN_HORIZON
+from .forms import ForecastConfigForm
+
+
+class ForecastConfigFormHorizonTest(SimpleTestCase):
+    """O horizonte é contado da origem da previsão (ontem), não da data inicial."""
+
+    def _form(self, start_date, horizon):
+        return ForecastConfigForm(data={
+            'start_date': start_date, 'frequencia': 'diaria', 'forecast_horizon': horizon,
+        })
+
+    def test_accepts_full_horizon_from_today(self):
+        self.assertTrue(self._form(timezone.localdate(), TRAIN_HORIZON).is_valid())
+
+    def test_rejects_horizon_past_training_with_future_start_date(self):
+        form = self._form(timezone.localdate() + timedelta(days=30), TRAIN_HORIZON)
+        self.assertFalse(form.is_valid())
+        self.assertIn('forecast_horizon', form.errors)
+
+    def test_accepts_future_start_date_within_training_horizon(self):
+        self.assertTrue(self._form(timezone.localdate() + timedelta(days=30), TRAIN_HORIZON - 30).is_valid())
@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect
 from django.urls import reverse
 from .models import ForecastConfig
 from .forms import ForecastConfigForm
-from forecast.forecast_pipeline import run_pipeline
+from forecast.jobs import enqueue_job
 
 def config_list_view(request):
     """
@@ -23,8 +23,8 @@ def config_list_view(request):
             
             config.save()  # Salva no banco
             
-            # Roda o pipeline passando a config atualizada
-            run_pipeline(config)
+            # Enfileira a geração de previsões com a config atualizada
+            enqueue_job('generate', config)
             
             # Redireciona para a mesma página para evitar reenvio do POST
             return redirect(reverse('config_list'))
@@ -1,3 +1,16 @@
 from django.contrib import admin
+from . import models
 
-# Register your models here.
+class ForecastJobAdmin(admin.ModelAdmin):
+    list_display = ('id','kind','status','stage','progress','created_at','finished_at',)
+    list_filter = ('kind','status',)
+
+admin.site.register(models.ForecastJob, ForecastJobAdmin)
+
+
+class ForecastRunAdmin(admin.ModelAdmin):
+    list_display = ('id','config','model_version','status','product_count','rows_written','wall_seconds','cpu_seconds','created_at',)
+    list_filter = ('status','model_version',)
+    readonly_fields = ('stages',)
+
+admin.site.register(models.ForecastRun, ForecastRunAdmin)
@@ -0,0 +1,147 @@
+import math
+import platform
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app import dashboard_cache
+from app.views import home
+from configs.models import ForecastConfig
+from .forecast_pipeline import run_pipeline, train_forecast_model
+from .synthetic import generate_store
+from .views import ExportForecastCSVView, ForecastListView
+
+DEFAULT_SCALES = (1000, 10000, 100000)
+
+
+def ensure_benchmark_database():
+    """
+    Os benchmarks gravam dados de verdade (lojas inteiras, saídas e baixas de
+    estoque) e seguram as travas de InventoryTotals enquanto medem: só rodam
+    com um settings de base dedicada.
+    """
+    if not getattr(settings, 'FORECAST_BENCHMARK', False):
+        raise ImproperlyConfigured(
+            "O benchmark precisa de uma base dedicada: rode com --settings=app.settings_benchmark "
+            "(ou um settings próprio com FORECAST_BENCHMARK = True)."
+        )
+
+
+def _timed(func):
+    """Executa `func` medindo tempo de parede, CPU e número de consultas."""
+    wall, cpu = time.perf_counter(), time.process_time()
+    with CaptureQueriesContext(connection) as queries:
+        result = func()
+    return result, {
+        'seconds': round(time.perf_counter() - wall, 4),
+        'cpu_seconds': round(time.process_time() - cpu, 4),
+        'queries': len(queries),
+    }
+
+
+def _consume(response):
+    """Lê o corpo inteiro (inclusive respostas em streaming) e devolve o tamanho."""
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+# -------------------------
+# Um cenário: gera a loja, mede cada etapa e desfaz tudo
+# -------------------------
+def run_scale(products, outflows_per_product=20, inflows_per_product=2, days=365, seed=42, horizon=30):
+    """
+    Mede treino, geração de previsões, lista de previsões, exportação e
+    dashboard para uma loja sintética de `products` produtos. Tudo roda em
+    uma transação desfeita no final (na base dedicada do benchmark) e o modelo
+    vai para um registro temporário, passado ao treino e ao pipeline.
+    """
+    ensure_benchmark_database()
+    factory = RequestFactory()
+    today = timezone.localdate()
+    period = {'start_date': today.isoformat(), 'end_date': (today + timedelta(days=horizon)).isoformat()}
+    steps = {}
+
+    with tempfile.TemporaryDirectory() as registry_dir, transaction.atomic():
+        try:
+            data, steps['generate_store'] = _timed(lambda: generate_store(
+                products=products,
+                categories=max(products // 50, 1),
+                brands=max(products // 20, 1),
+                suppliers=max(products // 100, 1),
+                outflows=products * outflows_per_product,
+                inflows=products * inflows_per_product,
+                days=days,
+                seed=seed,
+            ))
+            user = get_user_model().objects.create_superuser(
+                f'benchmark-{products}', password=None,
+            )
+            config = ForecastConfig.objects.create(
+                start_date=today, frequencia='diaria', forecast_horizon=horizon,
+            )
+
+            metrics, steps['train_forecast_model'] = _timed(
+                lambda: train_forecast_model(registry_dir=registry_dir)
+            )
+            rows, steps['run_pipeline'] = _timed(lambda: run_pipeline(config, registry_dir=registry_dir))
+            steps['run_pipeline']['rows'] = rows
+
+            request = factory.get('/forecast/forecast/list/', period)
+            request.user = user
+            response, steps['forecast_list'] = _timed(
+                lambda: ForecastListView.as_view()(request).render()
+            )
+            steps['forecast_list']['status'] = response.status_code
+
+            for export_format in ('csv', 'csv.gz'):
+                request = factory.get('/forecast/export/', {**period, 'format': export_format})
+                request.user = user
+                size, step = _timed(lambda: _consume(ExportForecastCSVView.as_view()(request)))
+                steps[f'export_{export_format}'] = {**step, 'bytes': size}
+
+            request = factory.get('/', {
+                'data_inicio': (today - timedelta(days=30)).isoformat(), 'data_fim': today.isoformat(),
+            })
+            request.user = user
+            dashboard_cache.bump_generation()  # mede o cálculo, não o cache
+            response, steps['home'] = _timed(lambda: home(request))
+            steps['home']['status'] = response.status_code
+        finally:
+            transaction.set_rollback(True)
+
+    # o cache pode ter guardado resultados dos dados desfeitos
+    dashboard_cache.bump_generation()
+
+    return {
+        'products': products,
+        'data': data,
+        'model_metrics': {
+            key: float(value) if math.isfinite(value) else None for key, value in (metrics or {}).items()
+        },
+        'steps': steps,
+    }
+
+
+def run_benchmark(scales=DEFAULT_SCALES, **options):
+    ensure_benchmark_database()
+    return {
+        'started_at': timezone.now().isoformat(),
+        'environment': {
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+        },
+        'options': options,
+        'scales': [run_scale(products, **options) for products in scales],
+    }
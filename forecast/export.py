@@ -0,0 +1,114 @@
+import csv
+import zlib
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet é opcional
+    pa = pq = None
+
+from django.db.models import OuterRef, Subquery
+
+from outflows.models import DailyOutflowSummary
+from .models import Forecast
+
+CHUNK_SIZE = 2000
+HEADER = ['Produto', 'Data', 'Previsto', 'Estoque', 'MAPE']
+
+
+class _Echo:
+    """Pseudo-arquivo: csv.writer devolve a linha formatada em vez de gravá-la."""
+    def write(self, value):
+        return value
+
+
+class _ChunkSink:
+    """Arquivo em memória esvaziado a cada bloco lido (usado pelo ParquetWriter)."""
+    def __init__(self):
+        self.buffer = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        self.buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+# -------------------------
+# Linhas de previsão + MAPE, lidas com cursor no servidor
+# -------------------------
+def iter_forecast_rows(start_date, end_date, mape):
+    """
+    Gera (produto, data, previsto, estoque, mape) sem carregar o período
+    inteiro em memória. A venda real de cada linha vem na mesma consulta
+    (subconsulta no resumo diário pela chave única produto/data).
+    """
+    actual = DailyOutflowSummary.objects.filter(
+        product_id=OuterRef('product_id'), date=OuterRef('date'),
+    ).values('qty')[:1]
+    rows = (
+        Forecast.objects.filter(date__range=(start_date, end_date))
+        .annotate(actual=Subquery(actual))
+        .values_list('product__title', 'date', 'predicted_quantity', 'product__quantity', 'actual')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    for title, date, predicted, stock, actual in rows:
+        yield title, date, predicted, stock, mape(predicted, actual or 0)
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for title, date, predicted, stock, mape_val in rows:
+        yield writer.writerow([title, date, predicted, stock, mape_val if mape_val is not None else '-'])
+
+
+def iter_gzip(chunks):
+    # wbits=31 -> cabeçalho/rodapé gzip
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def iter_parquet(rows, row_group_size=CHUNK_SIZE * 10):
+    """Grava um row group a cada `row_group_size` linhas e devolve os bytes gerados."""
+    if pa is None:
+        raise RuntimeError("Exportação Parquet requer o pacote pyarrow.")
+
+    schema = pa.schema([
+        ('produto', pa.string()),
+        ('data', pa.date32()),
+        ('previsto', pa.float64()),
+        ('estoque', pa.int64()),
+        ('mape', pa.float64()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='snappy')
+
+    def write_batch(batch):
+        writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+
+    batch = []
+    for title, date, predicted, stock, mape_val in rows:
+        batch.append({'produto': title, 'data': date, 'previsto': predicted, 'estoque': stock, 'mape': mape_val})
+        if len(batch) >= row_group_size:
+            write_batch(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_batch(batch)
+    writer.close()
+    yield sink.drain()
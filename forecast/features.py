@@ -0,0 +1,27 @@
+from datetime import datetime
+from django.db.models import Max, Q
+from outflows.models import Outflow
+
+SEGMENT_FIELDS = {'category': 'category_id', 'brand': 'brand_id'}
+
+
+# -------------------------
+# Marca d'água dos dados usados no treino (para retreino incremental)
+# -------------------------
+def data_watermark():
+    """Maior id e maior updated_at de Outflow no momento do treino."""
+    marks = Outflow.objects.aggregate(max_id=Max('id'), max_updated_at=Max('updated_at'))
+    return {
+        'max_id': marks['max_id'] or 0,
+        'max_updated_at': marks['max_updated_at'].isoformat() if marks['max_updated_at'] else None,
+    }
+
+
+def changed_product_ids(watermark):
+    """Ids dos produtos com saídas criadas ou alteradas depois da marca d'água."""
+    changed = Q(id__gt=watermark.get('max_id') or 0)
+    if watermark.get('max_updated_at'):
+        changed |= Q(updated_at__gt=datetime.fromisoformat(watermark['max_updated_at']))
+    return list(
+        Outflow.objects.filter(changed).order_by().values_list('product_id', flat=True).distinct()
+    )
@@ -1,169 +1,312 @@
-import os
+import time
 import numpy as np
-import pandas as pd
-from datetime import timedelta
 from django.conf import settings
-from joblib import dump, load
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from xgboost import XGBRegressor
+from .writer import write_forecasts
 from products.models import Product
-from outflows.models import Outflow
-from django.db.models import Sum
-from .models import Forecast
+from .features import data_watermark, changed_product_ids
+from .timeseries import (
+    FEATURES, FEATURE_SET, TARGET, TRAIN_HORIZON, build_training_set, build_inference_set,
+    horizon_from_origin, trained_horizon,
+)
+from .training import MODEL_PARAMS, evaluate, fit_model
+from .tuning import BUDGET_SECONDS, tune_hyperparameters
+from . import registry
+from .runs import RunLedger
 
-MODEL_PATH = os.path.join(settings.BASE_DIR, "forecast", "trained_model.pkl")
+
+def _report(progress, stage, percent):
+    # Repassa etapa/percentual para quem acompanha a execução (ex.: ForecastJob)
+    if progress:
+        progress(stage, percent)
+
+
+INCREMENTAL_TREES = 50  # árvores adicionadas a cada retreino incremental
+
+
+def default_segment_by():
+    # 'category', 'brand' ou None (modelo global único)
+    return getattr(settings, 'FORECAST_SEGMENT_BY', None)
+
+
+def tuned_params(registry_dir=None):
+    """Hiperparâmetros vencedores guardados no modelo atual (ou None)."""
+    version = registry.current_version(registry_dir)
+    if version is None:
+        return None
+    try:
+        return registry.read_meta(version, registry_dir).get('params')
+    except FileNotFoundError:
+        return None
+
+
+def resolve_params(X, y, tune=False, budget=None, workers=None, progress=None, registry_dir=None):
+    """
+    Com tune=True roda a busca de hiperparâmetros (20% -> 70%); senão reaproveita
+    os parâmetros do modelo atual. Retorna (params, resumo da busca ou None).
+    """
+    if tune:
+        _report(progress, 'tune', 20)
+        tuning = tune_hyperparameters(
+            X, y, budget_seconds=budget or BUDGET_SECONDS, workers=workers,
+            progress=lambda done, total: _report(progress, 'tune', 20 + 50 * done // total),
+        )
+        if tuning:
+            params = tuning.pop('params')
+            return params, tuning
+    return tuned_params(registry_dir), None
 
 
 # -------------------------
 # Treina o modelo de previsão diária
 # -------------------------
-def train_forecast_model(include_promotions=True):
-    products = Product.objects.all()
-    if not products.exists():
-        return None
+def train_forecast_model(include_promotions=True, progress=None, segment_by=None, workers=None,
+                         tune=False, budget=None, registry_dir=None):
+    """
+    Treina o modelo global. Com `segment_by` ('category' ou 'brand', padrão em
+    settings.FORECAST_SEGMENT_BY) treina um modelo por segmento em paralelo.
+    Com `tune` busca os hiperparâmetros antes (limite de `budget` segundos).
+    O modelo vai para o registro padrão ou para `registry_dir`.
+    """
+    segment_by = segment_by or default_segment_by()
+    if segment_by:
+        from .segments import train_segmented_model
+        return train_segmented_model(
+            segment_by, include_promotions=include_promotions, progress=progress, workers=workers,
+            tune=tune, budget=budget, registry_dir=registry_dir,
+        )
 
-    data = []
-    for product in products:
-        total_outflow = Outflow.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
-        promo_outflow = 0
-        if include_promotions:
-            promo_outflow = Outflow.objects.filter(product=product, promotion=True).aggregate(total=Sum('quantity'))['total'] or 0
-
-        days = max(Outflow.objects.filter(product=product).count(), 1)
-        daily_target = total_outflow / days  # target diário
-
-        data.append({
-            'quantity': product.quantity or 0,
-            'cost_price': product.cost_price or 0,
-            'selling_price': product.selling_price or 0,
-            'total_outflow': total_outflow,
-            'promo_outflow': promo_outflow,
-            'target': daily_target
-        })
-
-    df = pd.DataFrame(data)
-    if df.empty:
+    started = time.perf_counter()
+    _report(progress, 'features', 0)
+    watermark = data_watermark()
+    dataset = build_training_set(include_promotions=include_promotions)
+    if dataset is None:
         return None
 
-    features = ['quantity', 'cost_price', 'selling_price', 'total_outflow']
-    if include_promotions:
-        features.append('promo_outflow')
-    else:
-        df['promo_outflow'] = 0
-        features.append('promo_outflow')
+    params, tuning = resolve_params(
+        dataset['X'], dataset['y'], tune=tune, budget=budget, workers=workers, progress=progress,
+        registry_dir=registry_dir,
+    )
 
-    X = df[features]
-    y = df['target']
+    _report(progress, 'train', 70 if tune else 20)
+    _, model, scaler, metrics, rows = fit_model(dataset['X'], dataset['y'], params)
 
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    _report(progress, 'save', 90)
+    registry.save_model(model, scaler, {
+        'features': FEATURES,
+        'feature_set': FEATURE_SET,
+        'target': TARGET,
+        'train_horizon': TRAIN_HORIZON,
+        'include_promotions': include_promotions,
+        'metrics': metrics,
+        'training_rows': rows,
+        'training_seconds': time.perf_counter() - started,
+        'watermark': watermark,
+        'mode': 'full',
+        'params': params,
+        'tuning': tuning,
+    }, registry_dir=registry_dir)
 
-    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+    return metrics
+
+
+# -------------------------
+# Retreino incremental: continua o boosting só com produtos alterados
+# -------------------------
+def update_forecast_model(include_promotions=True, progress=None, n_estimators=INCREMENTAL_TREES):
+    """
+    Adiciona `n_estimators` árvores ao modelo atual usando apenas os produtos
+    com saídas novas/alteradas desde a marca d'água do modelo. O scaler do
+    modelo base é reaproveitado. Faz um treino completo se não houver modelo
+    compatível. Retorna as métricas, ou None se nada mudou.
+    """
+    started = time.perf_counter()
+    base = registry.load_current()
+    base_meta = base['meta'] if base else {}
+    if (
+        not base_meta.get('watermark')
+        or base_meta.get('feature_set') != FEATURE_SET
+        or base_meta.get('target') != TARGET
+        or trained_horizon(base_meta) != TRAIN_HORIZON
+        or base_meta.get('include_promotions') != include_promotions
+        or base_meta.get('segment_by')  # modelos por segmento são sempre retreinados por completo
+    ):
+        return train_forecast_model(
+            include_promotions=include_promotions, progress=progress,
+            segment_by=base_meta.get('segment_by'),
+        )
+
+    _report(progress, 'features', 0)
+    watermark = data_watermark()
+    product_ids = changed_product_ids(base_meta['watermark'])
+    if not product_ids:
+        return None
 
-    model = XGBRegressor(
-        n_estimators=200,
-        learning_rate=0.1,
-        max_depth=5,
-        random_state=42
+    dataset = build_training_set(
+        include_promotions=include_promotions,
+        products=Product.objects.filter(id__in=product_ids),
     )
-    model.fit(X_train, y_train)
+    if dataset is None:
+        return None
+
+    _report(progress, 'train', 20)
+    X_scaled = base['scaler'].transform(dataset['X'])
+    y = dataset['y']
+    # Mesma divisão de fit_model: as métricas são de linhas fora do treino
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+
+    # Os hiperparâmetros vêm do meta: o modelo carregado do registro (UBJSON)
+    # devolve None em get_params() e o XGBoost cairia nos padrões dele
+    model = XGBRegressor(**dict(MODEL_PARAMS, **(base_meta.get('params') or {}), n_estimators=n_estimators))
+    model.fit(X_train, y_train, xgb_model=base['model'].get_booster())
+
+    _report(progress, 'evaluate', 80)
+    metrics = evaluate(model, X_test, y_test)
+
+    _report(progress, 'save', 90)
+    registry.save_model(model, base['scaler'], dict(
+        base_meta,
+        metrics=metrics,
+        training_rows=int(len(y)),
+        training_seconds=time.perf_counter() - started,
+        watermark=watermark,
+        mode='incremental',
+        base_version=base['version'],
+    ))
+
+    return metrics
 
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-    r2 = r2_score(y_test, y_pred)
-    mape = np.mean(np.abs((y_test - y_pred) / np.where(y_test != 0, y_test, 1))) * 100
 
-    dump({"model": model, "scaler": scaler}, MODEL_PATH)
+# -------------------------
+# Grade de datas da previsão conforme a frequência
+# -------------------------
+DIA_SEMANA_MAP = {
+    'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3,
+    'sexta': 4, 'sabado': 5, 'domingo': 6
+}
+
+
+def build_date_grid(config):
+    """
+    Retorna um array NumPy (datetime64[D]) com as datas previstas dentro do
+    horizonte, filtradas pela frequência (diária, semanal ou mensal).
+    """
+    start = np.datetime64(config.start_date, 'D')
+    dates = start + np.arange(config.forecast_horizon)
 
-    return {"r2": r2, "rmse": rmse, "mae": mae, "mape": mape}
+    if config.frequencia == 'diaria':
+        return dates
+    if config.frequencia == 'semanal':
+        # 1970-01-01 foi quinta-feira (weekday 3)
+        weekdays = (dates.astype(np.int64) + 3) % 7
+        return dates[weekdays == DIA_SEMANA_MAP.get(config.dia_semana, 0)]
+    if config.frequencia == 'mensal':
+        if not config.dia_mes:
+            return dates
+        month_days = (dates - dates.astype('datetime64[M]')).astype(np.int64) + 1
+        return dates[month_days == config.dia_mes]
+    return dates[:0]
+
+
+# -------------------------
+# Predição em lote com o modelo carregado (global + segmentos)
+# -------------------------
+def _predict_rows(model, scaler, X):
+    # O XGBoost avalia as árvores em float32: converter antes evita a cópia
+    # interna do predict() do sklearn (mesmo resultado)
+    return model.get_booster().inplace_predict(scaler.transform(X).astype(np.float32))
+
+
+def predict(model_data, dataset):
+    """Demanda prevista (>= 0) para cada linha de dataset['X']."""
+    X = dataset['X']
+    predicted = _predict_rows(model_data['model'], model_data['scaler'], X)
+    # Produtos de segmentos com modelo próprio usam esse modelo; os demais, o global
+    for key, segment in model_data.get('segments', {}).items():
+        mask = dataset['segments'] == key
+        if mask.any():
+            predicted[mask] = _predict_rows(segment['model'], segment['scaler'], X[mask])
+    return np.clip(predicted, 0, None)
 
 
 # -------------------------
 # Executa pipeline de previsão considerando configuração
 # -------------------------
-def run_pipeline(config):
+def run_pipeline(config, progress=None, registry_dir=None):
     """
-    Executa a previsão com base na configuração passada.
+    Executa a previsão com base na configuração passada e registra a execução
+    (versão do modelo, produtos, linhas e tempo por etapa) em ForecastRun.
+    `registry_dir` troca o registro de modelos usado (padrão: o de produção).
     """
     if not config:
         return 0
 
-    # Treina modelo se não existir
-    if not os.path.exists(MODEL_PATH):
-        train_forecast_model(include_promotions=config.include_promotions)
+    ledger = RunLedger(config)
+    state = {'model_version': '', 'product_count': 0, 'rows_written': 0}
+    try:
+        _run_stages(config, progress, ledger, state, registry_dir)
+    except Exception as e:
+        ledger.fail(e, state['model_version'])
+        raise
+    ledger.finish(**state)
+    return state['rows_written']
 
-    model_data = load(MODEL_PATH)
-    model = model_data['model']
-    scaler = model_data['scaler']
 
-    products = Product.objects.all()
-    if not products.exists():
-        return 0
+def _run_stages(config, progress, ledger, state, registry_dir=None):
+    dates = build_date_grid(config)
+    if not len(dates):
+        return
+    # O modelo não extrapola além dos horizontes vistos no treino
+    horizon = horizon_from_origin(dates)
+    if horizon > TRAIN_HORIZON:
+        raise ValueError(
+            f"A última data prevista fica a {horizon} dias da origem; "
+            f"o modelo é treinado para até {TRAIN_HORIZON} dias."
+        )
+
+    # Treina modelo se não existir (ou se foi treinado com outro conjunto de features ou horizonte menor)
+    current = registry.load_current(registry_dir)
+    if (
+        current is None
+        or current['meta'].get('feature_set') != FEATURE_SET
+        or trained_horizon(current['meta']) < horizon
+    ):
+        _report(progress, 'train', 0)
+        with ledger.stage('train'):
+            train_forecast_model(include_promotions=config.include_promotions, registry_dir=registry_dir)
+
+    _report(progress, 'load', 10)
+    with ledger.stage('load'):
+        model_data = registry.load_current(registry_dir)
+    if model_data is None:
+        return
+    state['model_version'] = model_data['version']
+    segment_by = model_data['meta'].get('segment_by')
+
+    # Features por (produto, data): lags/janelas até a origem + dia da semana e horizonte
+    _report(progress, 'features', 20)
+    with ledger.stage('features'):
+        dataset = build_inference_set(
+            dates, include_promotions=config.include_promotions, segment_by=segment_by,
+        )
+    if dataset is None:
+        return
+    state['product_count'] = len(dataset['product_ids'])
+
+    _report(progress, 'predict', 40)
+    with ledger.stage('predict'):
+        quantities = np.round(predict(model_data, dataset))
+
+        # Linhas em ordem produto → data, a mesma das features
+        product_ids = np.repeat(dataset['product_ids'], len(dates))
+        all_dates = np.tile(dates.astype(object), len(dataset['product_ids']))
 
-    data_list = []
-    for product in products:
-        total_outflow = Outflow.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
-        promo_outflow = 0
-        if config.include_promotions:
-            promo_outflow = Outflow.objects.filter(product=product, promotion=True).aggregate(total=Sum('quantity'))['total'] or 0
-
-        data_list.append({
-            'product_id': product.id,
-            'quantity': product.quantity or 0,
-            'cost_price': product.cost_price or 0,
-            'selling_price': product.selling_price or 0,
-            'total_outflow': total_outflow,
-            'promo_outflow': promo_outflow
-        })
-
-    df = pd.DataFrame(data_list)
-
-    # Seleção de features
-    features = ['quantity', 'cost_price', 'selling_price', 'total_outflow']
-    if config.include_promotions:
-        features.append('promo_outflow')
-    else:
-        df['promo_outflow'] = 0
-        features.append('promo_outflow')
-
-    X_scaled = scaler.transform(df[features])
-    df['predicted_quantity'] = model.predict(X_scaled)
-
-    forecast_count = 0
-    start_date = config.start_date
-    horizon_days = config.forecast_horizon
-
-    # Map dias da semana
-    dia_map = {
-        'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3,
-        'sexta': 4, 'sabado': 5, 'domingo': 6
-    }
-
-    # Cria ou atualiza previsões
-    for _, row in df.iterrows():
-        for day_offset in range(horizon_days):
-            date = start_date + timedelta(days=day_offset)
-
-            # Lógica de frequência
-            if config.frequencia == 'diaria':
-                pass
-            elif config.frequencia == 'semanal':
-                if date.weekday() != dia_map.get(config.dia_semana, 0):
-                    continue
-            elif config.frequencia == 'mensal':
-                if config.dia_mes and date.day != config.dia_mes:
-                    continue
-            else:
-                continue
-
-            Forecast.objects.update_or_create(
-                product_id=row['product_id'],
-                date=date,
-                defaults={'predicted_quantity': max(0, int(row['predicted_quantity']))}
-            )
-            forecast_count += 1
-
-    return forecast_count
+    # Cria ou atualiza previsões em lote (50% -> 100% conforme os blocos gravados)
+    _report(progress, 'write', 50)
+    with ledger.stage('write'):
+        result = write_forecasts(
+            product_ids, all_dates, quantities,
+            on_chunk=lambda written, total: _report(progress, 'write', 50 + 50 * written // total),
+        )
+    state['rows_written'] = result['rows']
@@ -0,0 +1,153 @@
+import logging
+import math
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import ForecastJob
+from .forecast_pipeline import run_pipeline, train_forecast_model, update_forecast_model
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_TIMEOUT = getattr(settings, 'FORECAST_JOB_HEARTBEAT_TIMEOUT', 300)
+MAX_ATTEMPTS = getattr(settings, 'FORECAST_JOB_MAX_ATTEMPTS', 2)
+
+
+# -------------------------
+# Enfileira um job (chamado pelas views)
+# -------------------------
+def enqueue_job(kind, config=None):
+    return ForecastJob.objects.create(kind=kind, config=config)
+
+
+# -------------------------
+# Reserva jobs na fila para o worker
+# -------------------------
+def claim_jobs(limit):
+    """
+    Marca até `limit` jobs da fila como 'running' e retorna seus ids.
+    SKIP LOCKED permite mais de um worker consumindo a mesma tabela.
+    """
+    if limit <= 0:
+        return []
+
+    with transaction.atomic():
+        ids = list(
+            ForecastJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        now = timezone.now()
+        ForecastJob.objects.filter(id__in=ids).update(
+            status='running', started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+        )
+    return ids
+
+
+def heartbeat(job_ids):
+    """Chamado pelo worker a cada volta do loop para os jobs que ele executa."""
+    if job_ids:
+        ForecastJob.objects.filter(id__in=job_ids, status='running').update(heartbeat_at=timezone.now())
+
+
+# -------------------------
+# Recupera jobs de workers que pararam de responder
+# -------------------------
+def reclaim_stale_jobs(timeout=HEARTBEAT_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+    """
+    Jobs 'running' sem heartbeat há mais de `timeout` segundos (worker morto)
+    voltam para a fila; os que já foram reservados `max_attempts` vezes são
+    marcados como falhos. Retorna (recolocados, falhos).
+    """
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = ForecastJob.objects.filter(status='running').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    requeued, failed = _release(stale, "O worker parou de responder durante a execução.", max_attempts)
+    if requeued or failed:
+        logger.warning("Jobs sem heartbeat: %s recolocados na fila, %s falharam", requeued, failed)
+    return requeued, failed
+
+
+def release_jobs(job_ids, error, max_attempts=MAX_ATTEMPTS):
+    """
+    Devolve à fila jobs 'running' cujo processo do pool morreu (o job que
+    derrubou o processo falha ao atingir `max_attempts`). Retorna (recolocados, falhos).
+    """
+    return _release(ForecastJob.objects.filter(id__in=job_ids, status='running'), error, max_attempts)
+
+
+def requeue_unstarted(job_ids):
+    """Jobs reservados que nem chegaram ao pool voltam à fila sem contar a tentativa."""
+    return ForecastJob.objects.filter(id__in=job_ids, status='running').update(
+        status='queued', started_at=None, heartbeat_at=None, attempts=F('attempts') - 1
+    )
+
+
+def _release(jobs, error, max_attempts):
+    failed = jobs.filter(attempts__gte=max_attempts).update(
+        status='failed', error=str(error), finished_at=timezone.now()
+    )
+    requeued = jobs.update(status='queued', stage='', progress=0, started_at=None, heartbeat_at=None)
+    return requeued, failed
+
+
+def mark_failed(job_id, error):
+    ForecastJob.objects.filter(pk=job_id).update(
+        status='failed', error=str(error), finished_at=timezone.now()
+    )
+
+
+def _progress_reporter(job_id):
+    def report(stage, percent):
+        ForecastJob.objects.filter(pk=job_id).update(
+            stage=stage, progress=min(int(percent), 100), heartbeat_at=timezone.now()
+        )
+    return report
+
+
+def _train_message(metrics):
+    if not metrics:
+        return "Treinamento não foi executado (dados insuficientes)."
+    return (
+        f"Modelo treinado! R²: {metrics['r2']:.2f}, "
+        f"RMSE: {metrics['rmse']:.2f}, "
+        f"MAE: {metrics['mae']:.2f}, "
+        f"MAPE: {metrics['mape']:.2f}%"
+    )
+
+
+# -------------------------
+# Executa um job (roda dentro do processo do pool)
+# -------------------------
+def run_job(job_id):
+    job = ForecastJob.objects.select_related('config').get(pk=job_id)
+    progress = _progress_reporter(job_id)
+
+    try:
+        if job.kind in ('train', 'train_incremental', 'train_tuned'):
+            if job.kind == 'train_incremental':
+                metrics = update_forecast_model(progress=progress)
+            else:
+                metrics = train_forecast_model(progress=progress, tune=job.kind == 'train_tuned')
+            # NaN/inf não são JSON válido para o banco
+            result = {k: float(v) if math.isfinite(v) else None for k, v in (metrics or {}).items()}
+            result['message'] = _train_message(metrics)
+        elif job.kind == 'generate':
+            if not job.config:
+                raise ValueError("Nenhuma configuração encontrada.")
+            rows = run_pipeline(job.config, progress=progress)
+            result = {'rows': rows, 'message': f"{rows} previsões geradas com sucesso!"}
+        else:
+            raise ValueError(f"Tipo de job desconhecido: {job.kind}")
+    except Exception as e:
+        logger.exception("Job %s falhou", job_id)
+        mark_failed(job_id, e)
+        return 'failed'
+
+    ForecastJob.objects.filter(pk=job_id).update(
+        status='done', stage='done', progress=100, result=result, finished_at=timezone.now()
+    )
+    return 'done'
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from forecast.synthetic import generate_store
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera uma loja sintética reprodutível (categorias, marcas, fornecedores, produtos, "
+        "entradas e saídas com sazonalidade e promoções) gravada em lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--brands', type=int, default=50)
+        parser.add_argument('--suppliers', type=int, default=30)
+        parser.add_argument('--products', type=int, default=1000)
+        parser.add_argument('--outflows', type=int, default=20000)
+        parser.add_argument('--inflows', type=int, default=2000)
+        parser.add_argument('--days', type=int, default=365, help="Período histórico, terminando hoje.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        data = generate_store(
+            categories=options['categories'],
+            brands=options['brands'],
+            suppliers=options['suppliers'],
+            products=options['products'],
+            outflows=options['outflows'],
+            inflows=options['inflows'],
+            days=options['days'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Loja sintética criada: {data['products']} produtos, {data['outflows']} saídas, "
+            f"{data['inflows']} entradas, {data['summary_rows']} linhas de resumo diário."
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from forecast.forecast_pipeline import train_forecast_model, update_forecast_model
+
+
+class Command(BaseCommand):
+    help = "Retreina o modelo de previsão (completo ou incremental). Pensado para rodar agendado (cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help="Continua o modelo atual usando apenas saídas novas desde o último treino.")
+        parser.add_argument('--segment-by', choices=['category', 'brand'],
+                            help="Treina um modelo por categoria/marca em paralelo (padrão: FORECAST_SEGMENT_BY).")
+        parser.add_argument('--workers', type=int,
+                            help="Processos do treino segmentado/da busca (padrão: núcleos da máquina).")
+        parser.add_argument('--tune', action='store_true',
+                            help="Busca hiperparâmetros (successive halving + early stopping) antes de treinar.")
+        parser.add_argument('--budget', type=float,
+                            help="Tempo máximo da busca em segundos (padrão: FORECAST_TUNING_BUDGET_SECONDS).")
+
+    def handle(self, *args, **options):
+        if options['incremental']:
+            metrics = update_forecast_model()
+        else:
+            metrics = train_forecast_model(
+                segment_by=options['segment_by'], workers=options['workers'],
+                tune=options['tune'], budget=options['budget'],
+            )
+
+        if not metrics:
+            self.stdout.write("Nenhum dado novo para treinar.")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Modelo treinado! R²: {metrics['r2']:.2f}, RMSE: {metrics['rmse']:.2f}, "
+            f"MAE: {metrics['mae']:.2f}, MAPE: {metrics['mape']:.2f}%"
+        ))
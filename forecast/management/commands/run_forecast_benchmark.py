@@ -0,0 +1,50 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from forecast.benchmark import DEFAULT_SCALES, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede treino, geração de previsões, lista, exportação e dashboard em lojas sintéticas "
+        "de vários tamanhos e grava o resultado em JSON. Os dados gerados são desfeitos no final. "
+        "Só roda em base dedicada (--settings=app.settings_benchmark)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                            help="Quantidades de produtos a medir.")
+        parser.add_argument('--outflows-per-product', type=int, default=20)
+        parser.add_argument('--inflows-per-product', type=int, default=2)
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Arquivo JSON (padrão: benchmarks/forecast-<data>.json).")
+
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmark(
+                scales=options['scales'],
+                outflows_per_product=options['outflows_per_product'],
+                inflows_per_product=options['inflows_per_product'],
+                days=options['days'],
+                seed=options['seed'],
+            )
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f"forecast-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+
+        for scale in results['scales']:
+            timings = ', '.join(f"{name} {step['seconds']:.2f}s" for name, step in scale['steps'].items())
+            self.stdout.write(f"{scale['products']} produtos: {timings}")
+        self.stdout.write(self.style.SUCCESS(f"Resultados gravados em {output}"))
@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from forecast.jobs import (
+    claim_jobs, heartbeat, mark_failed, reclaim_stale_jobs, release_jobs, requeue_unstarted, run_job,
+)
+
+
+class Command(BaseCommand):
+    help = "Processa a fila de jobs de treinamento/geração de previsões em um pool de processos."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Número de processos no pool.")
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help="Segundos entre consultas à fila.")
+        parser.add_argument('--once', action='store_true',
+                            help="Encerra quando a fila estiver vazia.")
+
+    def _make_executor(self, workers):
+        # 'spawn' garante conexões de banco novas em cada processo;
+        # django.setup roda como initializer antes do primeiro job
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        )
+
+    def _replace_executor(self, broken):
+        # Um processo do pool morreu: o executor fica inutilizável. Troca uma vez
+        # só (os futures restantes do executor antigo chegam depois, já trocado).
+        if broken is self.executor:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._make_executor(self.workers)
+
+    def _submit(self, job_ids):
+        """Envia os jobs ao pool; retorna quantos voltaram à fila sem rodar."""
+        requeued = 0
+        for job_id in job_ids:
+            try:
+                future = self.executor.submit(run_job, job_id)
+            except BrokenProcessPool:
+                requeued += requeue_unstarted([job_id])
+                self._replace_executor(self.executor)
+                self.stdout.write(f"Job {job_id} devolvido à fila (pool reiniciado).")
+                continue
+            self.running[future] = (job_id, self.executor)
+            self.stdout.write(f"Job {job_id} iniciado.")
+        return requeued
+
+    def _collect(self, done):
+        lost = []
+        for future in done:
+            job_id, executor = self.running.pop(future)
+            try:
+                status = future.result()
+            except BrokenProcessPool:  # processo do pool morreu
+                lost.append(job_id)
+                self._replace_executor(executor)
+                continue
+            except Exception as e:
+                mark_failed(job_id, e)
+                status = 'failed'
+            self.stdout.write(f"Job {job_id} finalizado: {status}.")
+        if lost:
+            requeued, failed = release_jobs(lost, "Um processo do pool morreu durante a execução.")
+            self.stdout.write(f"Pool reiniciado: {requeued} job(s) devolvido(s) à fila, {failed} falharam.")
+
+    def handle(self, *args, **options):
+        self.workers = max(options['workers'], 1)
+        poll_interval = options['poll_interval']
+
+        self.executor = self._make_executor(self.workers)
+        self.running = {}
+        self.stdout.write(f"Worker iniciado com {self.workers} processo(s).")
+
+        try:
+            while True:
+                # sinal de vida dos jobs deste worker; os de workers mortos voltam à fila
+                heartbeat([job_id for job_id, _ in self.running.values()])
+                reclaim_stale_jobs()
+                requeued = self._submit(claim_jobs(self.workers - len(self.running)))
+
+                if not self.running:
+                    if options['once'] and not requeued:
+                        break
+                    connections.close_all()
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(self.running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                self._collect(done)
+        except KeyboardInterrupt:
+            self.stdout.write("Encerrando worker...")
+        finally:
+            self.executor.shutdown(wait=True, cancel_futures=True)
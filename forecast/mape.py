@@ -0,0 +1,87 @@
+import threading
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from outflows.models import DailyOutflowSummary
+from .models import Forecast
+
+
+def mape_from_actual(predicted, real_qty):
+    # Mesmo critério do signal: sem vendas reais o MAPE fica indefinido
+    if real_qty > 0:
+        return abs((real_qty - predicted) / real_qty) * 100
+    return None
+
+
+# -------------------------
+# Recalcula o daily_mape de vários (produto, dia) de uma vez
+# -------------------------
+def refresh_daily_mape(keys):
+    """
+    Recalcula o daily_mape das previsões dos pares (product_id, date) em
+    `keys` com uma leitura das previsões, uma do resumo diário e um bulk_update.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    product_ids = {product_id for product_id, _ in keys}
+    dates = {date for _, date in keys}
+
+    forecasts = [
+        f for f in Forecast.objects.filter(product_id__in=product_ids, date__in=dates)
+        if (f.product_id, f.date) in keys
+    ]
+    if not forecasts:
+        return 0
+
+    actuals = {
+        (product_id, date): qty
+        for product_id, date, qty in DailyOutflowSummary.objects.filter(
+            product_id__in=product_ids, date__in=dates
+        ).values_list('product_id', 'date', 'qty')
+    }
+
+    for f in forecasts:
+        f.daily_mape = mape_from_actual(f.predicted_quantity, actuals.get((f.product_id, f.date), 0))
+
+    Forecast.objects.bulk_update(forecasts, ['daily_mape'], batch_size=1000)
+    return len(forecasts)
+
+
+# -------------------------
+# Pares (produto, dia) pendentes, recalculados uma vez no commit
+# -------------------------
+_pending = threading.local()  # alias do banco -> chaves sujas da transação atual
+
+
+def _pending_keys(using):
+    if not hasattr(_pending, 'keys'):
+        _pending.keys = {}
+    return _pending.keys.setdefault(using or DEFAULT_DB_ALIAS, set())
+
+
+def _flush(using):
+    """Callback de on_commit: recalcula tudo o que a thread marcou até o commit."""
+    keys = _pending_keys(using)
+    if keys:
+        pending = set(keys)
+        keys.clear()
+        refresh_daily_mape(pending)
+
+
+def mark_dirty_many(keys, using=None):
+    """
+    Marca vários (produto, dia) para recálculo do MAPE. Dentro de uma
+    transação as chaves se acumulam em um conjunto da thread e são processadas
+    juntas por um único callback de on_commit (os demais encontram o conjunto
+    vazio). Chaves de uma transação desfeita ficam para o próximo commit, que
+    só as recalcula de novo. Fora de transação o recálculo é imediato.
+    """
+    _pending_keys(using).update(keys)
+    transaction.on_commit(partial(_flush, using), using=using)
+
+
+def mark_dirty(product_id, date, using=None):
+    mark_dirty_many([(product_id, date)], using=using)
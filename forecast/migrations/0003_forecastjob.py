@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0002_forecastconfig_include_promotions'),
+        ('forecast', '0002_forecast_daily_mape'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('train', 'Treinamento'), ('generate', 'Geração de previsões')], max_length=20)),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Executando'), ('done', 'Concluído'), ('failed', 'Falhou')], default='queued', max_length=10)),
+                ('stage', models.CharField(blank=True, default='', max_length=50)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='configs.forecastconfig')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
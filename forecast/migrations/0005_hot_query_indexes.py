@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:59
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('forecast', '0004_alter_forecastjob_kind'),
+        ('products', '0003_inventorytotals'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='forecast',
+            index=models.Index(fields=['date'], name='forecast_date_idx'),
+        ),
+    ]
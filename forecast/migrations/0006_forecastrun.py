@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('configs', '0002_forecastconfig_include_promotions'),
+        ('forecast', '0005_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_version', models.CharField(blank=True, default='', max_length=100)),
+                ('status', models.CharField(choices=[('running', 'Executando'), ('done', 'Concluído'), ('failed', 'Falhou')], default='running', max_length=10)),
+                ('product_count', models.PositiveIntegerField(default=0)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('stages', models.JSONField(blank=True, default=dict)),
+                ('wall_seconds', models.FloatField(blank=True, null=True)),
+                ('cpu_seconds', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('config', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='runs', to='configs.forecastconfig')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
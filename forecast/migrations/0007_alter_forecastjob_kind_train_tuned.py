@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forecast', '0006_forecastrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='forecastjob',
+            name='kind',
+            field=models.CharField(choices=[('train', 'Treinamento'), ('train_incremental', 'Treinamento incremental'), ('train_tuned', 'Treinamento com busca de hiperparâmetros'), ('generate', 'Geração de previsões')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,57 @@
+import os
+import threading
+import time
+
+# slot -> (path, versão do arquivo, dados carregados); uma única versão por slot
+_cache = {}
+_stats = {'hits': 0, 'misses': 0, 'load_seconds': 0.0}
+_lock = threading.Lock()
+
+
+def _file_version(path):
+    # mtime em ns + tamanho + inode: muda sempre que um novo modelo é gravado
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+# -------------------------
+# Carrega o modelo uma vez por processo e reutiliza enquanto o arquivo não mudar
+# -------------------------
+def get_model(path, loader, slot=None):
+    """
+    Retorna o artefato carregado por `loader(path)`, recarregando apenas
+    quando o caminho ou a versão (mtime/tamanho/inode) muda. Cada `slot` (por
+    padrão o próprio caminho) guarda uma única versão: a anterior é descartada
+    ao recarregar. O loader é obrigatório (o do registro é
+    registry._load_version_dir).
+    """
+    slot = slot or path
+    version = _file_version(path)
+
+    with _lock:
+        entry = _cache.get(slot)
+        if entry and entry[0] == path and entry[1] == version:
+            _stats['hits'] += 1
+            return entry[2]
+
+        started = time.perf_counter()
+        data = loader(path)
+        _stats['load_seconds'] += time.perf_counter() - started
+        _stats['misses'] += 1
+        _cache[slot] = (path, version, data)
+        return data
+
+
+def invalidate(slot=None):
+    """Remove um slot (ou todos) do cache."""
+    with _lock:
+        if slot is None:
+            _cache.clear()
+        else:
+            _cache.pop(slot, None)
+
+
+def model_cache_stats():
+    """Contadores de acertos, falhas e tempo total gasto carregando modelos."""
+    with _lock:
+        return dict(_stats, entries=len(_cache))
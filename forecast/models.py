@@ -1,5 +1,6 @@
 from django.db import models
 from products.models import Product
+from configs.models import ForecastConfig
 
 class Forecast(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='forecasts')
@@ -12,6 +13,71 @@ class Forecast(models.Model):
     class Meta:
         unique_together = ('product', 'date')
         ordering = ['product', 'date']
+        indexes = [
+            # listagem e exportação filtram só pelo período
+            models.Index(fields=['date'], name='forecast_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.product.title} - {self.date}"
+
+
+class ForecastJob(models.Model):
+    KIND_CHOICES = [
+        ('train', 'Treinamento'),
+        ('train_incremental', 'Treinamento incremental'),
+        ('train_tuned', 'Treinamento com busca de hiperparâmetros'),
+        ('generate', 'Geração de previsões'),
+    ]
+    STATUS_CHOICES = [
+        ('queued', 'Na fila'),
+        ('running', 'Executando'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=50, blank=True, default='')  # etapa atual do pipeline
+    progress = models.PositiveSmallIntegerField(default=0)  # percentual concluído (0-100)
+    config = models.ForeignKey(ForecastConfig, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    result = models.JSONField(null=True, blank=True)  # métricas finais
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # último sinal do worker que o executa
+    attempts = models.PositiveSmallIntegerField(default=0)  # vezes que foi reservado por um worker
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.status})"
+
+
+class ForecastRun(models.Model):
+    """Registro de cada execução do pipeline: quem gerou as previsões e quanto custou cada etapa."""
+    STATUS_CHOICES = [
+        ('running', 'Executando'),
+        ('done', 'Concluído'),
+        ('failed', 'Falhou'),
+    ]
+
+    config = models.ForeignKey(ForecastConfig, on_delete=models.SET_NULL, null=True, blank=True, related_name='runs')
+    model_version = models.CharField(max_length=100, blank=True, default='')  # versão do registro de modelos
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    product_count = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    stages = models.JSONField(default=dict, blank=True)  # etapa -> {seconds, cpu_seconds}
+    wall_seconds = models.FloatField(null=True, blank=True)
+    cpu_seconds = models.FloatField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Execução #{self.id} ({self.model_version or '-'}, {self.status})"
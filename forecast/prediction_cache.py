@@ -0,0 +1,64 @@
+import threading
+import time
+
+from django.conf import settings
+
+# Por quanto tempo as previsões de um produto são reaproveitadas. Limita o
+# atraso com que preços alterados e saídas retroativas chegam à API.
+TTL_SECONDS = getattr(settings, 'FORECAST_PREDICT_CACHE_SECONDS', 300)
+
+# Um único slot por processo: (versão do modelo, origem, promoções, segmentação)
+# -> previsões por produto. Trocar a chave descarta tudo (memória limitada a
+# produtos do catálogo × maior horizonte pedido).
+_slot = {'key': None, 'expires': 0.0, 'rows': {}, 'absent': set()}
+_stats = {'hits': 0, 'misses': 0}
+_lock = threading.Lock()
+
+
+# -------------------------
+# Previsões por produto, calculando só os que faltam
+# -------------------------
+def get_predictions(key, product_ids, horizon, compute):
+    """
+    Retorna ({product_id: previsões[:horizon]}, ids inexistentes). Produtos
+    sem previsão em cache (ou com horizonte menor) são calculados juntos por
+    compute(ids) -> (ids encontrados, matriz len(ids) × horizon).
+    """
+    now = time.monotonic()
+    with _lock:
+        if _slot['key'] != key or now >= _slot['expires']:
+            _slot.update(key=key, expires=now + TTL_SECONDS, rows={}, absent=set())
+        rows, absent = _slot['rows'], _slot['absent']
+
+        found, pending = {}, []
+        for product_id in product_ids:
+            row = rows.get(product_id)
+            if row is not None and len(row) >= horizon:
+                found[product_id] = row[:horizon]
+            elif product_id not in absent:
+                pending.append(product_id)
+        _stats['hits'] += len(found)
+        _stats['misses'] += len(pending)
+
+    if pending:
+        computed_ids, predictions = compute(pending)
+        computed = dict(zip(computed_ids, predictions))
+        found.update(computed)
+        with _lock:
+            if _slot['rows'] is rows:  # o slot não foi trocado enquanto calculávamos
+                rows.update(computed)
+                absent.update(set(pending) - computed.keys())
+
+    missing = [product_id for product_id in product_ids if product_id not in found]
+    return found, missing
+
+
+def invalidate():
+    with _lock:
+        _slot.update(key=None, expires=0.0, rows={}, absent=set())
+
+
+def prediction_cache_stats():
+    """Produtos servidos do cache (hits) e calculados (misses)."""
+    with _lock:
+        return dict(_stats, entries=len(_slot['rows']))
@@ -0,0 +1,162 @@
+import json
+import os
+import shutil
+import uuid
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from sklearn.preprocessing import StandardScaler
+from xgboost import XGBRegressor
+from .model_cache import get_model
+
+# Estrutura do registro:
+#   <REGISTRY_DIR>/versions/<versão>/model.ubj   booster no formato nativo (UBJSON)
+#   <REGISTRY_DIR>/versions/<versão>/scaler.npz  média/escala do StandardScaler
+#   <REGISTRY_DIR>/versions/<versão>/meta.json   features, métricas, linhas, duração
+#   <REGISTRY_DIR>/versions/<versão>/segments/<id>/  modelo + scaler de cada segmento (opcional)
+#   <REGISTRY_DIR>/CURRENT                       nome da versão em produção
+# Todas as funções aceitam `registry_dir` para usar outro registro (ex.: benchmark).
+REGISTRY_DIR = getattr(
+    settings, 'FORECAST_MODEL_REGISTRY_DIR',
+    os.path.join(settings.BASE_DIR, "forecast", "model_registry"),
+)
+KEEP_VERSIONS = getattr(settings, 'FORECAST_MODEL_KEEP_VERSIONS', 10)
+
+MODEL_FILE = 'model.ubj'
+SCALER_FILE = 'scaler.npz'
+META_FILE = 'meta.json'
+SEGMENTS_DIR = 'segments'
+
+
+def _versions_dir(registry_dir=None):
+    return os.path.join(registry_dir or REGISTRY_DIR, 'versions')
+
+
+def _current_file(registry_dir=None):
+    return os.path.join(registry_dir or REGISTRY_DIR, 'CURRENT')
+
+
+def version_path(version, registry_dir=None):
+    return os.path.join(_versions_dir(registry_dir), version)
+
+
+# -------------------------
+# Grava uma nova versão imutável e a promove para "current"
+# -------------------------
+def _write_artifacts(path, model, scaler):
+    os.makedirs(path, exist_ok=True)
+    model.save_model(os.path.join(path, MODEL_FILE))
+    np.savez(os.path.join(path, SCALER_FILE), mean=scaler.mean_, scale=scaler.scale_)
+
+
+def save_model(model, scaler, meta, promote=True, segments=None, registry_dir=None):
+    """
+    Grava booster, scaler e metadados em um diretório temporário e o renomeia
+    para o nome definitivo da versão, de modo que leitores nunca vejam uma
+    versão pela metade. `segments` ({id: (modelo, scaler)}) guarda modelos
+    por segmento ao lado do global. Retorna o nome da versão.
+    """
+    os.makedirs(_versions_dir(registry_dir), exist_ok=True)
+    version = timezone.now().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:8]
+    tmp_dir = os.path.join(_versions_dir(registry_dir), f'.tmp-{version}')
+    os.makedirs(tmp_dir)
+
+    _write_artifacts(tmp_dir, model, scaler)
+    for key, (segment_model, segment_scaler) in (segments or {}).items():
+        _write_artifacts(os.path.join(tmp_dir, SEGMENTS_DIR, str(key)), segment_model, segment_scaler)
+    with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+        json.dump(dict(meta, version=version), f, indent=2, default=float)
+
+    os.rename(tmp_dir, version_path(version, registry_dir))
+
+    if promote:
+        promote_version(version, registry_dir)
+    return version
+
+
+def promote_version(version, registry_dir=None):
+    """Aponta CURRENT para `version` com um rename atômico."""
+    if not os.path.isdir(version_path(version, registry_dir)):
+        raise ValueError(f"Versão de modelo inexistente: {version}")
+
+    current_file = _current_file(registry_dir)
+    tmp_file = f'{current_file}.{uuid.uuid4().hex[:8]}.tmp'
+    with open(tmp_file, 'w') as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, current_file)
+    prune_versions(registry_dir=registry_dir)
+
+
+def current_version(registry_dir=None):
+    try:
+        with open(_current_file(registry_dir)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_versions(registry_dir=None):
+    versions_dir = _versions_dir(registry_dir)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(v for v in os.listdir(versions_dir) if not v.startswith('.'))
+
+
+def prune_versions(keep=KEEP_VERSIONS, registry_dir=None):
+    """Remove as versões mais antigas, preservando sempre a versão atual."""
+    current = current_version(registry_dir)
+    candidates = [v for v in list_versions(registry_dir) if v != current]
+    for version in candidates[:max(len(candidates) - keep, 0)]:
+        shutil.rmtree(version_path(version, registry_dir), ignore_errors=True)
+
+
+# -------------------------
+# Leitura
+# -------------------------
+def read_meta(version, registry_dir=None):
+    with open(os.path.join(version_path(version, registry_dir), META_FILE)) as f:
+        return json.load(f)
+
+
+def _read_artifacts(path):
+    model = XGBRegressor()
+    model.load_model(os.path.join(path, MODEL_FILE))
+
+    params = np.load(os.path.join(path, SCALER_FILE))
+    scaler = StandardScaler()
+    scaler.mean_ = params['mean']
+    scaler.scale_ = params['scale']
+    scaler.var_ = params['scale'] ** 2
+    scaler.n_features_in_ = len(params['mean'])
+    return model, scaler
+
+
+def _load_version_dir(path):
+    model, scaler = _read_artifacts(path)
+
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+
+    segments = {}
+    segments_dir = os.path.join(path, SEGMENTS_DIR)
+    if os.path.isdir(segments_dir):
+        for key in os.listdir(segments_dir):
+            segment_model, segment_scaler = _read_artifacts(os.path.join(segments_dir, key))
+            segments[int(key)] = {'model': segment_model, 'scaler': segment_scaler}
+
+    return {'model': model, 'scaler': scaler, 'meta': meta, 'version': meta['version'], 'segments': segments}
+
+
+def load_version(version, registry_dir=None):
+    """Carrega (via cache do processo) uma versão específica do registro."""
+    return get_model(version_path(version, registry_dir), loader=_load_version_dir, slot='registry')
+
+
+def load_current(registry_dir=None):
+    """Carrega a versão em produção, ou None se nenhum modelo foi treinado."""
+    version = current_version(registry_dir)
+    if version is None:
+        return None
+    return load_version(version, registry_dir)
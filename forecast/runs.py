@@ -0,0 +1,68 @@
+import time
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .models import ForecastRun
+
+
+# -------------------------
+# Registro de execuções do pipeline com tempo por etapa
+# -------------------------
+class RunLedger:
+    """
+    Cria um ForecastRun no início da execução e acumula tempo de parede e de
+    CPU por etapa (features, load, predict, write...). `finish` e `fail`
+    gravam os totais.
+    """
+
+    def __init__(self, config=None):
+        self.run = ForecastRun.objects.create(config=config)
+        self.stages = {}
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    @contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(name, {'seconds': 0.0, 'cpu_seconds': 0.0})
+            totals['seconds'] = round(totals['seconds'] + time.perf_counter() - wall, 4)
+            totals['cpu_seconds'] = round(totals['cpu_seconds'] + time.process_time() - cpu, 4)
+
+    def _save(self, **fields):
+        ForecastRun.objects.filter(pk=self.run.pk).update(
+            stages=self.stages,
+            wall_seconds=round(time.perf_counter() - self._wall, 4),
+            cpu_seconds=round(time.process_time() - self._cpu, 4),
+            finished_at=timezone.now(),
+            **fields,
+        )
+
+    def finish(self, model_version='', product_count=0, rows_written=0):
+        self._save(
+            status='done', model_version=model_version or '',
+            product_count=product_count, rows_written=rows_written,
+        )
+
+    def fail(self, error, model_version=''):
+        self._save(status='failed', model_version=model_version or '', error=str(error))
+
+
+def serialize_run(run):
+    return {
+        "id": run.id,
+        "config_id": run.config_id,
+        "model_version": run.model_version,
+        "status": run.status,
+        "product_count": run.product_count,
+        "rows_written": run.rows_written,
+        "stages": run.stages,
+        "wall_seconds": run.wall_seconds,
+        "cpu_seconds": run.cpu_seconds,
+        "error": run.error,
+        "created_at": run.created_at.isoformat(),
+        "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+    }
@@ -0,0 +1,98 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from django.conf import settings
+
+from . import registry
+from .features import SEGMENT_FIELDS, data_watermark
+from .timeseries import FEATURES, FEATURE_SET, TARGET, TRAIN_HORIZON, build_training_set
+from .forecast_pipeline import _report, resolve_params
+from .training import fit_model
+
+# Segmentos com menos produtos que isso usam o modelo global
+MIN_SEGMENT_PRODUCTS = getattr(settings, 'FORECAST_MIN_SEGMENT_PRODUCTS', 50)
+
+
+# -------------------------
+# Treino por categoria/marca em paralelo, com modelo global de reserva
+# -------------------------
+def train_segmented_model(segment_by='category', include_promotions=True, progress=None,
+                          workers=None, min_products=MIN_SEGMENT_PRODUCTS, tune=False, budget=None,
+                          registry_dir=None):
+    """
+    Treina, em um ProcessPoolExecutor, um modelo global (usado pelos segmentos
+    pequenos) e um modelo por categoria ou marca com pelo menos `min_products`
+    produtos. Tudo vai para uma única versão do registro. Retorna as métricas
+    do modelo global; as de cada segmento ficam em meta['segments']. Os
+    hiperparâmetros (buscados com `tune`) valem para todos os modelos.
+    """
+    if segment_by not in SEGMENT_FIELDS:
+        raise ValueError(f"Segmentação inválida: {segment_by}")
+
+    started = time.perf_counter()
+    _report(progress, 'features', 0)
+    watermark = data_watermark()
+    dataset = build_training_set(include_promotions=include_promotions, segment_by=segment_by)
+    if dataset is None:
+        return None
+
+    X, y = dataset['X'], dataset['y']
+    keys, counts = np.unique(dataset['segments'], return_counts=True)
+    products = dict(zip(keys.tolist(), (counts // dataset['rows_per_product']).tolist()))
+    large = [int(key) for key, count in products.items() if count >= min_products]
+
+    tuned, tuning = resolve_params(
+        X, y, tune=tune, budget=budget, workers=workers, progress=progress, registry_dir=registry_dir,
+    )
+
+    # Processos não compartilham núcleos: divide as threads do XGBoost entre eles
+    tasks = len(large) + 1
+    workers = max(1, min(workers or os.cpu_count() or 1, tasks))
+    params = dict(tuned or {}, n_jobs=max(1, (os.cpu_count() or 1) // workers))
+
+    start = 70 if tune else 20
+    _report(progress, 'train', start)
+    trained = {}
+    # 'spawn': os filhos só importam forecast.training (sem Django nem conexões herdadas)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = [pool.submit(fit_model, X, y, params, None)]
+        for key in large:
+            mask = dataset['segments'] == key
+            futures.append(pool.submit(fit_model, X[mask], y[mask], params, key))
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            key, model, scaler, metrics, rows = future.result()
+            trained[key] = (model, scaler, metrics, rows)
+            _report(progress, 'train', start + (90 - start) * done // tasks)
+
+    model, scaler, metrics, rows = trained.pop(None)
+
+    _report(progress, 'save', 90)
+    registry.save_model(model, scaler, {
+        'features': FEATURES,
+        'feature_set': FEATURE_SET,
+        'target': TARGET,
+        'train_horizon': TRAIN_HORIZON,
+        'include_promotions': include_promotions,
+        'metrics': metrics,
+        'training_rows': rows,
+        'training_seconds': time.perf_counter() - started,
+        'watermark': watermark,
+        'mode': 'full',
+        'segment_by': segment_by,
+        'min_segment_products': min_products,
+        'workers': workers,
+        'params': tuned,
+        'tuning': tuning,
+        'segments': {
+            str(key): {'products': products[key], 'training_rows': segment_rows, 'metrics': segment_metrics}
+            for key, (_, _, segment_metrics, segment_rows) in trained.items()
+        },
+    }, segments={
+        key: (segment_model, segment_scaler) for key, (segment_model, segment_scaler, _, _) in trained.items()
+    }, registry_dir=registry_dir)
+
+    return metrics
@@ -0,0 +1,25 @@
+from django.conf import settings
+from rest_framework import serializers
+
+from .timeseries import TRAIN_HORIZON
+
+MAX_PRODUCTS = getattr(settings, 'FORECAST_PREDICT_MAX_PRODUCTS', 5000)
+# Nunca além do horizonte de treino: o modelo não extrapola horizontes não vistos
+MAX_HORIZON = min(getattr(settings, 'FORECAST_PREDICT_MAX_HORIZON', 90), TRAIN_HORIZON)
+
+
+class IdListField(serializers.ListField):
+    child = serializers.IntegerField(min_value=1)
+
+    def run_child_validation(self, data):
+        # Caminho rápido para listas só com inteiros positivos: o ListField
+        # valida item a item (caro com milhares de ids). Qualquer outro valor
+        # passa pela validação normal, com os erros por posição.
+        if all(type(item) is int and item >= 1 for item in data):
+            return list(data)
+        return super().run_child_validation(data)
+
+
+class PredictRequestSerializer(serializers.Serializer):
+    product_ids = IdListField(allow_empty=False, max_length=MAX_PRODUCTS)
+    horizon = serializers.IntegerField(min_value=1, max_value=MAX_HORIZON, default=30)
@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from app.dashboard_cache import bump_generation
+from brands.models import Brands
+from categories.models import Category
+from inflows.models import Inflow
+from outflows.models import Outflow
+from outflows.rollup import rebuild_daily_summary
+from products.models import Product
+from products.totals import reconcile
+from suppliers.models import Supplier
+
+BATCH_SIZE = 5000
+PREFIX = 'Sintético'
+
+# Sazonalidade semanal (segunda..domingo) e peso extra das vendas em promoção
+WEEKDAY_FACTOR = np.array([0.9, 0.95, 1.0, 1.0, 1.1, 1.3, 1.2])
+PROMO_WEEK_SHARE = 0.15
+PROMO_UPLIFT = 1.8
+
+
+@contextmanager
+def _keep_timestamps(*models):
+    """Desliga auto_now/auto_now_add para gravar datas históricas com bulk_create."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _bulk_insert(model, objects, batch_size=BATCH_SIZE, return_objects=False):
+    """
+    bulk_create em blocos a partir de um gerador (só um bloco em memória).
+    Retorna a quantidade gravada, ou os objetos criados com `return_objects`
+    (para quem precisa das PKs).
+    """
+    created = [] if return_objects else None
+    count = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= batch_size:
+            saved = model.objects.bulk_create(batch)
+            count += len(saved)
+            if return_objects:
+                created += saved
+            batch = []
+    saved = model.objects.bulk_create(batch)
+    count += len(saved)
+    if return_objects:
+        created += saved
+    return created if return_objects else count
+
+
+def _money(values):
+    return [Decimal(f'{value:.2f}') for value in values]
+
+
+def _day_weights(start, days):
+    """Peso de cada dia: sazonalidade anual (senoide) × dia da semana."""
+    dates = np.arange(days)
+    day_of_year = (np.datetime64(start, 'D') + dates).astype('datetime64[D]')
+    doy = (day_of_year - day_of_year.astype('datetime64[Y]')).astype(int)
+    weekday = (day_of_year.astype(int) + 3) % 7  # 1970-01-01 foi quinta
+    weights = (1 + 0.3 * np.sin(2 * np.pi * doy / 365.25)) * WEEKDAY_FACTOR[weekday]
+    return weights / weights.sum()
+
+
+def _timestamps(start, day_offsets, rng):
+    """Horários (gerador) entre 8h e 20h de cada dia sorteado."""
+    base = timezone.make_aware(datetime.combine(start, time(8)))
+    seconds = rng.integers(0, 12 * 3600, size=len(day_offsets))
+    return (base + timedelta(days=int(d), seconds=int(s)) for d, s in zip(day_offsets, seconds))
+
+
+# -------------------------
+# Loja sintética (categorias, marcas, fornecedores, produtos, entradas, saídas)
+# -------------------------
+def generate_store(categories=20, brands=50, suppliers=30, products=1000,
+                   outflows=20000, inflows=2000, days=365, seed=42, batch_size=BATCH_SIZE):
+    """
+    Gera uma loja sintética reprodutível (mesma `seed`, mesmos dados) e grava
+    tudo com bulk_create. As saídas seguem sazonalidade anual e semanal, com
+    semanas de promoção por categoria e demanda maior nelas. Como bulk_create
+    não dispara signals, resumo diário, totais do estoque e cache do dashboard
+    são recalculados no final.
+    """
+    rng = np.random.default_rng(seed)
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+
+    with transaction.atomic(), _keep_timestamps(Inflow, Outflow):
+        category_objs = Category.objects.bulk_create(
+            [Category(name=f'{PREFIX} categoria {i:04d}') for i in range(categories)]
+        )
+        brand_objs = Brands.objects.bulk_create(
+            [Brands(name=f'{PREFIX} marca {i:04d}') for i in range(brands)]
+        )
+        supplier_objs = Supplier.objects.bulk_create(
+            [Supplier(name=f'{PREFIX} fornecedor {i:04d}') for i in range(suppliers)]
+        )
+
+        # Produtos: preço de custo log-normal, margem de 20% a 80%
+        category_idx = rng.integers(0, categories, size=products)
+        brand_idx = rng.integers(0, brands, size=products)
+        cost = np.round(rng.lognormal(3.5, 0.8, size=products), 2) + 1
+        selling = np.round(cost * rng.uniform(1.2, 1.8, size=products), 2)
+        demand = rng.lognormal(0, 1, size=products)
+
+        # Saídas: produto proporcional à demanda, dia pelos pesos sazonais
+        out_product = rng.choice(products, size=outflows, p=demand / demand.sum())
+        out_day = rng.choice(days, size=outflows, p=_day_weights(start, days))
+        promo_weeks = rng.random((categories, days // 7 + 1)) < PROMO_WEEK_SHARE
+        out_promo = promo_weeks[category_idx[out_product], out_day // 7]
+        out_qty = rng.poisson(np.where(out_promo, PROMO_UPLIFT, 1.0) * 2) + 1
+
+        # Entradas: reposições espalhadas no período
+        in_product = rng.integers(0, products, size=inflows)
+        in_day = rng.integers(0, days, size=inflows)
+        in_qty = rng.integers(10, 200, size=inflows)
+        in_supplier = rng.integers(0, suppliers, size=inflows)
+        in_cost = cost[in_product] * rng.uniform(0.9, 1.1, size=inflows)
+
+        # Estoque final = entradas - saídas + margem (alguns produtos em risco)
+        stock = (
+            np.bincount(in_product, weights=in_qty, minlength=products)
+            - np.bincount(out_product, weights=out_qty, minlength=products)
+        )
+        stock = np.maximum(stock, 0).astype(np.int64) + rng.integers(0, 50, size=products)
+
+        cost_money, selling_money = _money(cost), _money(selling)
+        product_objs = _bulk_insert(Product, (
+            Product(
+                title=f'{PREFIX} produto {i:07d}',
+                category=category_objs[category_idx[i]],
+                brand=brand_objs[brand_idx[i]],
+                cost_price=cost_money[i],
+                last_cost_price=cost_money[i],
+                selling_price=selling_money[i],
+                quantity=int(stock[i]),
+            )
+            for i in range(products)
+        ), batch_size, return_objects=True)
+        product_ids = np.array([p.pk for p in product_objs])
+
+        out_created = _timestamps(start, out_day, rng)
+        _bulk_insert(Outflow, (
+            Outflow(
+                product_id=int(product_ids[out_product[i]]),
+                quantity=int(out_qty[i]),
+                promotion=bool(out_promo[i]),
+                description=PREFIX,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            for i, created_at in zip(range(outflows), out_created)
+        ), batch_size)
+
+        in_created = _timestamps(start, in_day, rng)
+        _bulk_insert(Inflow, (
+            Inflow(
+                product_id=int(product_ids[in_product[i]]),
+                supplier=supplier_objs[in_supplier[i]],
+                quantity=int(in_qty[i]),
+                cost_price=Decimal(f'{in_cost[i]:.2f}'),
+                description=PREFIX,
+                created_at=created_at,
+                updated_at=created_at,
+            )
+            for i, created_at in zip(range(inflows), in_created)
+        ), batch_size)
+
+        summary_rows = rebuild_daily_summary()
+        reconcile(fix=True)
+        transaction.on_commit(bump_generation)
+
+    return {
+        'categories': categories,
+        'brands': brands,
+        'suppliers': suppliers,
+        'products': products,
+        'outflows': outflows,
+        'inflows': inflows,
+        'days': days,
+        'summary_rows': summary_rows,
+    }
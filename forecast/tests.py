@@ -0,0 +1,237 @@
+import re
+from datetime import date, datetime, time, timedelta
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from brands.models import Brands
+from categories.models import Category
+from outflows.models import DailyOutflowSummary, Outflow
+from products.models import Product
+from .jobs import claim_jobs, heartbeat, reclaim_stale_jobs
+from .management.commands.run_forecast_worker import Command as WorkerCommand
+from .models import Forecast, ForecastJob
+
+
+class ForecastListViewQueryCountTest(TestCase):
+    """A listagem de previsões faz o mesmo número de consultas para qualquer período ou catálogo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', password='admin')
+        cls.category = Category.objects.create(name='Categoria')
+        cls.brand = Brands.objects.create(name='Marca')
+        cls.start = date(2025, 1, 1)
+        cls._create_products(5)
+
+    @classmethod
+    def _create_products(cls, count):
+        for i in range(count):
+            product = Product.objects.create(
+                title=f'Produto {i}', category=cls.category, brand=cls.brand,
+                cost_price=10, selling_price=15, quantity=5,
+            )
+            for day in range(90):
+                Forecast.objects.create(product=product, date=cls.start + timedelta(days=day), predicted_quantity=3)
+            for day in range(0, 90, 3):
+                DailyOutflowSummary.objects.create(
+                    product=product, date=cls.start + timedelta(days=day), qty=2, promo_qty=1, count=1,
+                )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _get(self, days):
+        return self.client.get(reverse('forecast_list'), {
+            'start_date': self.start.isoformat(),
+            'end_date': (self.start + timedelta(days=days - 1)).isoformat(),
+        })
+
+    def test_query_count_does_not_grow_with_the_period(self):
+        for days in (7, 90):
+            with self.subTest(days=days), self.assertNumQueries(5):
+                response = self._get(days)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['forecasts_by_date']), days)
+            self.assertEqual(response.context['total_predicted'], 5 * days * 3)
+
+    def test_query_count_does_not_grow_with_the_catalog(self):
+        self._create_products(20)
+        with self.assertNumQueries(5):
+            response = self._get(30)
+        self.assertEqual(response.context['total_predicted'], 25 * 30 * 3)
+
+
+# -------------------------
+# Consultas quentes (mesmo formato das views, do pipeline e do resumo diário)
+# -------------------------
+def hot_querysets(start_date, end_date, product_ids):
+    inicio_dt = timezone.make_aware(datetime.combine(start_date, time.min))
+    fim_dt = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    forecasts = Forecast.objects.filter(date__range=(start_date, end_date))
+    summary = DailyOutflowSummary.objects.filter(date__range=(start_date, end_date))
+    actual = DailyOutflowSummary.objects.filter(
+        product_id=OuterRef('product_id'), date=OuterRef('date'),
+    ).values('qty')[:1]
+
+    return [
+        # ForecastListView
+        ('forecast_list: previsões do período', forecasts.select_related('product')),
+        ('forecast_list: vendas reais do período', summary.values_list('product_id', 'date', 'qty')),
+        ('forecast_list: impacto de promoções',
+         DailyOutflowSummary.objects.filter(product_id__in=forecasts.values('product_id'))
+         .values_list('qty', 'promo_qty')),
+        # ExportForecastCSVView (export.iter_forecast_rows)
+        ('export: previsões com a venda real',
+         forecasts.annotate(actual=Subquery(actual))
+         .values_list('product__title', 'date', 'predicted_quantity', 'product__quantity', 'actual')),
+        # home()
+        ('home: última saída do período',
+         Outflow.objects.filter(created_at__gte=inicio_dt, created_at__lt=fim_dt).order_by('-created_at')[:1]),
+        ('home: vendas do período', summary.values_list('date', 'qty')),
+        ('home: vendas mensais',
+         summary.annotate(mes=TruncMonth('date')).values('mes')
+         .annotate(total=Coalesce(Sum('qty'), 0)).order_by('mes')),
+        # run_pipeline / API de predição (timeseries.load_history)
+        ('pipeline: histórico do resumo diário',
+         summary.order_by().values_list('product_id', 'date', 'qty', 'promo_qty')),
+        ('predict: histórico dos produtos pedidos',
+         summary.filter(product__in=Product.objects.filter(id__in=product_ids))
+         .order_by().values_list('product_id', 'date', 'qty', 'promo_qty')),
+        # retreino incremental (features.data_watermark / changed_product_ids)
+        ('retreino: marca d\'água', Outflow.objects.order_by('-updated_at').values_list('updated_at')[:1]),
+        ('retreino: produtos alterados',
+         Outflow.objects.filter(Q(id__gt=0) | Q(updated_at__gt=fim_dt)).order_by()
+         .values_list('product_id', flat=True).distinct()),
+        # ingestão em lote (rollup.refresh_days)
+        ('rollup: saídas de produtos em um intervalo',
+         Outflow.objects.filter(product_id__in=product_ids, created_at__gte=inicio_dt, created_at__lt=fim_dt)
+         .order_by().annotate(day=TruncDate('created_at')).values('product_id', 'day')
+         .annotate(total=Coalesce(Sum('quantity'), 0))),
+        # OutflowCreateListAPIView (paginação por cursor)
+        ('api: página de saídas',
+         Outflow.objects.filter(created_at__lt=fim_dt).order_by('-created_at', '-id')[:100]),
+    ]
+
+
+@skipUnless(connection.vendor == 'postgresql', "Planos de execução verificados só no PostgreSQL.")
+class HotQueryPlanTest(TestCase):
+    """
+    Roda EXPLAIN nas consultas quentes e falha se alguma fizer Seq Scan em
+    saídas, previsões ou resumo diário. Com enable_seqscan = off o planner só
+    mantém o Seq Scan quando nenhum índice serve ao filtro ou à ordenação, então
+    o resultado não depende do volume de dados do banco de teste.
+    """
+    WATCHED_TABLES = {
+        Outflow._meta.db_table,
+        Forecast._meta.db_table,
+        DailyOutflowSummary._meta.db_table,
+    }
+    SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+    def test_hot_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')  # desfeito com a transação do teste
+
+        start_date = date(2025, 1, 1)
+        for label, queryset in hot_querysets(start_date, start_date + timedelta(days=30), [1, 2, 3]):
+            with self.subTest(label):
+                plan = queryset.explain()
+                scanned = self.WATCHED_TABLES.intersection(self.SEQ_SCAN.findall(plan))
+                self.assertFalse(scanned, f"Seq Scan em {', '.join(sorted(scanned))}:\n{plan}")
+
+
+class ReclaimStaleJobsTest(TestCase):
+    """Jobs de um worker que morreu não ficam 'running' para sempre."""
+
+    def _age(self, job_id, seconds):
+        ForecastJob.objects.filter(pk=job_id).update(heartbeat_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_stale_job_is_requeued_then_failed(self):
+        job = ForecastJob.objects.create(kind='train')
+        self.assertEqual(claim_jobs(1), [job.pk])
+
+        self._age(job.pk, 60)
+        self.assertEqual(reclaim_stale_jobs(timeout=300, max_attempts=2), (0, 0))
+
+        self._age(job.pk, 600)
+        self.assertEqual(reclaim_stale_jobs(timeout=300, max_attempts=2), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+
+        self.assertEqual(claim_jobs(1), [job.pk])
+        self._age(job.pk, 600)
+        self.assertEqual(reclaim_stale_jobs(timeout=300, max_attempts=2), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_heartbeat_keeps_job_running(self):
+        job = ForecastJob.objects.create(kind='train')
+        claim_jobs(1)
+        self._age(job.pk, 600)
+        heartbeat([job.pk])
+        self.assertEqual(reclaim_stale_jobs(timeout=300), (0, 0))
+
+
+class _BrokenExecutor:
+    """Executor cujo pool já morreu: submit falha como no ProcessPoolExecutor."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("processo do pool morreu")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+class WorkerBrokenPoolTest(TestCase):
+    """Um processo do pool que morre não derruba os jobs seguintes."""
+
+    def setUp(self):
+        self.command = WorkerCommand(stdout=StringIO())
+        self.command.workers = 1
+        self.command.running = {}
+        self.command.executor = self.broken = _BrokenExecutor()
+        self.replacement = _BrokenExecutor()
+        self.command._make_executor = lambda workers: self.replacement
+
+    def test_submit_on_broken_pool_requeues_and_rebuilds(self):
+        job = ForecastJob.objects.create(kind='train')
+
+        self.assertEqual(self.command._submit(claim_jobs(1)), 1)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 0))
+        self.assertTrue(self.broken.shut_down)
+        self.assertIs(self.command.executor, self.replacement)
+
+    def test_jobs_lost_with_the_pool_are_requeued_once_per_executor(self):
+        jobs = [ForecastJob.objects.create(kind='train') for _ in range(2)]
+        futures = []
+        for job_id in claim_jobs(2):
+            future = Future()
+            future.set_exception(BrokenProcessPool("processo do pool morreu"))
+            self.command.running[future] = (job_id, self.broken)
+            futures.append(future)
+
+        self.command._collect(futures)
+
+        self.assertEqual(
+            set(ForecastJob.objects.filter(pk__in=[j.pk for j in jobs]).values_list('status', flat=True)),
+            {'queued'},
+        )
+        self.assertTrue(self.broken.shut_down)
+        self.assertIs(self.command.executor, self.replacement)
+        self.assertFalse(self.replacement.shut_down)
+        self.assertEqual(self.command.running, {})
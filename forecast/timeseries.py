@@ -0,0 +1,254 @@
+from datetime import timedelta
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from outflows.models import DailyOutflowSummary
+from products.models import Product
+from .features import SEGMENT_FIELDS
+
+# Features por (produto, origem, horizonte). A origem é o último dia observado;
+# lags e janelas terminam nela, dia da semana e horizonte são do dia previsto.
+FEATURES = [
+    'lag_1', 'lag_7', 'lag_14', 'lag_28',
+    'mean_7', 'std_7', 'mean_28', 'std_28', 'mean_91',
+    'promo_share_28', 'dow_mean_28',
+    'dow', 'horizon', 'cost_price', 'selling_price',
+]
+FEATURE_SET = 'timeseries'
+TARGET = 'daily_demand'
+
+LOOKBACK_DAYS = 91  # maior janela usada pelas features
+TRAIN_ORIGINS = getattr(settings, 'FORECAST_TRAIN_ORIGINS', 12)  # origens de treino, uma por semana
+# Horizontes sorteados em 1..N dias: o modelo só aprende os horizontes que vê,
+# então N cobre o maior servido (API de predição e configurações de previsão)
+TRAIN_HORIZON = getattr(settings, 'FORECAST_TRAIN_HORIZON', getattr(settings, 'FORECAST_PREDICT_MAX_HORIZON', 90))
+LEGACY_TRAIN_HORIZON = 35  # modelos gravados antes de 'train_horizon' existir no meta
+SAMPLES_PER_ORIGIN = 2
+ORIGIN_STEP = 7
+CHUNK_SIZE = 100_000
+
+
+# -------------------------
+# Matriz produto × dia de demanda, lida do resumo diário
+# -------------------------
+def load_history(end_date, days, products=None, segment_by=None):
+    """
+    Carrega `days` dias de demanda terminando em `end_date` em uma matriz densa
+    (n_produtos × dias, float32). Todos os produtos entram, inclusive os sem
+    vendas. A promoção fica esparsa (produto, dia, qty) para as janelas de
+    participação, sem uma segunda matriz.
+    """
+    summary = DailyOutflowSummary.objects.all()
+    if products is None:
+        products = Product.objects.all()
+    else:
+        summary = summary.filter(product__in=products)
+    start = end_date - timedelta(days=days - 1)
+
+    fields = ['id', 'cost_price', 'selling_price']
+    if segment_by:
+        fields.append(SEGMENT_FIELDS[segment_by])
+    catalog = np.array(
+        [[value or 0 for value in row] for row in products.order_by('id').values_list(*fields)],
+        dtype=np.float64,
+    ).reshape(-1, len(fields))
+    product_ids = catalog[:, 0].astype(np.int64)
+
+    demand = np.zeros((len(product_ids), days), dtype=np.float32)
+    promo_rows, promo_days, promo_qty = [], [], []
+    day_index = {start + timedelta(days=k): k for k in range(days)}
+
+    rows = (
+        summary.filter(date__range=(start, end_date))
+        .order_by()
+        .values_list('product_id', 'date', 'qty', 'promo_qty')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    while True:
+        chunk = list(islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+        ids, dates, qty, promo = zip(*chunk)
+        row_idx = np.searchsorted(product_ids, np.array(ids, dtype=np.int64))
+        day_idx = np.fromiter(map(day_index.__getitem__, dates), dtype=np.int64, count=len(dates))
+        demand[row_idx, day_idx] = qty
+
+        promo = np.array(promo, dtype=np.float32)
+        has_promo = promo > 0
+        promo_rows.append(row_idx[has_promo])
+        promo_days.append(day_idx[has_promo])
+        promo_qty.append(promo[has_promo])
+
+    history = {
+        'product_ids': product_ids,
+        'prices': catalog[:, 1:3],
+        'start': np.datetime64(start, 'D'),
+        'demand': demand,
+        'promo': (
+            np.concatenate(promo_rows) if promo_rows else np.zeros(0, np.int64),
+            np.concatenate(promo_days) if promo_days else np.zeros(0, np.int64),
+            np.concatenate(promo_qty) if promo_qty else np.zeros(0, np.float32),
+        ),
+    }
+    if segment_by:
+        history['segments'] = catalog[:, 3].astype(np.int64)
+    return history
+
+
+# -------------------------
+# Features de todas as origens de uma vez (cumsum / fatias com passo 7)
+# -------------------------
+def _origin_features(history, origins, include_promotions):
+    """
+    Retorna (base, dow_profile) para as origens (índices de dia):
+      - base: n × n_origens × 10 (lags, médias/desvios móveis, participação da promoção)
+      - dow_profile: n × n_origens × 7, média de cada dia da semana nos últimos 28 dias,
+        na ordem em que aparecem na janela
+    """
+    demand = history['demand']
+    n, days = demand.shape
+    t = np.asarray(origins, dtype=np.int64)
+
+    # Somas acumuladas com uma coluna zero à esquerda: soma(a..b) = S[b+1] - S[a]
+    S = np.zeros((n, days + 1))
+    np.cumsum(demand, axis=1, out=S[:, 1:])
+    S2 = np.zeros((n, days + 1))
+    np.cumsum(np.square(demand, dtype=np.float64), axis=1, out=S2[:, 1:])
+
+    def window(width):
+        total = S[:, t + 1] - S[:, t + 1 - width]
+        mean = total / width
+        var = (S2[:, t + 1] - S2[:, t + 1 - width]) / width - mean ** 2
+        return total, mean, np.sqrt(np.maximum(var, 0))
+
+    _, mean_7, std_7 = window(7)
+    total_28, mean_28, std_28 = window(28)
+    _, mean_91, _ = window(91)
+
+    promo_share = np.zeros((n, len(t)))
+    if include_promotions:
+        rows, day, qty = history['promo']
+        for a, origin in enumerate(t):
+            in_window = (day > origin - 28) & (day <= origin)
+            promo_share[:, a] = np.bincount(rows[in_window], weights=qty[in_window], minlength=n)
+        promo_share = np.divide(promo_share, total_28, out=np.zeros_like(promo_share), where=total_28 > 0)
+
+    base = np.stack([
+        demand[:, t], demand[:, t - 6], demand[:, t - 13], demand[:, t - 27],
+        mean_7, std_7, mean_28, std_28, mean_91, promo_share,
+    ], axis=2)
+
+    # Coluna c da janela de 28 dias (t-27..t): os dias t-27+c, t-20+c, t-13+c, t-6+c
+    dow_profile = np.stack([
+        demand[:, (t - 27 + c)[:, None] + np.arange(0, 28, 7)].mean(axis=2) for c in range(7)
+    ], axis=2)
+    return base, dow_profile
+
+
+def _assemble(history, base, dow_profile, origins, horizons):
+    """
+    Monta as linhas (produto, origem, horizonte). `horizons` tem forma
+    n × n_origens × k (ou 1 × 1 × k, igual para todos). Retorna X (float32)
+    em ordem produto → origem → horizonte.
+    """
+    n = base.shape[0]
+    horizons = np.broadcast_to(horizons, (n, base.shape[1], horizons.shape[2]))
+    origins = np.asarray(origins, dtype=np.int64)[None, :, None]
+
+    target_days = history['start'] + (origins + horizons)
+    weekday = (target_days.astype(np.int64) + 3) % 7  # 1970-01-01 foi quinta
+    dow_mean = np.take_along_axis(dow_profile, (horizons + 27) % 7, axis=2)
+    prices = np.broadcast_to(history['prices'][:, None, None, :], horizons.shape + (2,))
+
+    X = np.concatenate([
+        np.broadcast_to(base[:, :, None, :], horizons.shape + (base.shape[2],)),
+        dow_mean[..., None],
+        weekday[..., None],
+        horizons[..., None],
+        prices,
+    ], axis=3)
+    return X.reshape(-1, len(FEATURES)).astype(np.float32)
+
+
+# -------------------------
+# Conjuntos de treino e de inferência
+# -------------------------
+def build_training_set(include_promotions=True, products=None, segment_by=None,
+                       end_date=None, origins=TRAIN_ORIGINS, horizon=TRAIN_HORIZON, seed=42):
+    """
+    Amostras de treino: para `origins` origens semanais terminando `horizon`
+    dias antes de `end_date`, sorteia SAMPLES_PER_ORIGIN horizontes por
+    produto e usa a demanda real do dia alvo como alvo.
+    Retorna {'X', 'y', 'product_ids', 'segments'?} ou None sem produtos.
+    """
+    end_date = end_date or timezone.localdate() - timedelta(days=1)
+    days = LOOKBACK_DAYS + horizon + ORIGIN_STEP * (origins - 1)
+    history = load_history(end_date, days, products=products, segment_by=segment_by)
+    n = len(history['product_ids'])
+    if not n:
+        return None
+
+    last = days - 1
+    origin_idx = last - horizon - ORIGIN_STEP * np.arange(origins)
+    base, dow_profile = _origin_features(history, origin_idx, include_promotions)
+
+    rng = np.random.default_rng(seed)
+    horizons = rng.integers(1, horizon + 1, size=(n, origins, SAMPLES_PER_ORIGIN))
+    X = _assemble(history, base, dow_profile, origin_idx, horizons)
+    y = history['demand'][np.arange(n)[:, None, None], origin_idx[None, :, None] + horizons].reshape(-1)
+
+    rows_per_product = origins * SAMPLES_PER_ORIGIN
+    dataset = {
+        'X': X,
+        'y': y.astype(np.float64),
+        'product_ids': np.repeat(history['product_ids'], rows_per_product),
+        'rows_per_product': rows_per_product,
+    }
+    if segment_by:
+        dataset['segments'] = np.repeat(history['segments'], rows_per_product)
+    return dataset
+
+
+def trained_horizon(meta):
+    """Maior horizonte (dias após a origem) visto no treino do modelo."""
+    return meta.get('train_horizon', LEGACY_TRAIN_HORIZON)
+
+
+def inference_origin(dates):
+    """Origem padrão da previsão: véspera da primeira data, no máximo ontem."""
+    yesterday = timezone.localdate() - timedelta(days=1)
+    return min(dates.min().astype(object) - timedelta(days=1), yesterday)
+
+
+def horizon_from_origin(dates):
+    """Dias entre a origem padrão e a última data de `dates` (maior horizonte pedido)."""
+    return (dates.max().astype(object) - inference_origin(dates)).days
+
+
+def build_inference_set(dates, include_promotions=True, segment_by=None, origin_date=None, products=None):
+    """
+    Linhas para prever cada produto (todos, ou só `products`) em cada data de
+    `dates` (datetime64[D]) a partir da origem (padrão: véspera da primeira
+    data, no máximo ontem). Ordem produto → data, a mesma de
+    np.repeat(product_ids) × np.tile(dates).
+    """
+    if origin_date is None:
+        origin_date = inference_origin(dates)
+
+    history = load_history(origin_date, LOOKBACK_DAYS, products=products, segment_by=segment_by)
+    if not len(history['product_ids']):
+        return None
+
+    origin_idx = np.array([LOOKBACK_DAYS - 1])
+    base, dow_profile = _origin_features(history, origin_idx, include_promotions)
+    horizons = (dates - np.datetime64(origin_date, 'D')).astype(np.int64)[None, None, :]
+    dataset = {
+        'X': _assemble(history, base, dow_profile, origin_idx, horizons),
+        'product_ids': history['product_ids'],
+    }
+    if segment_by:
+        dataset['segments'] = np.repeat(history['segments'], len(dates))
+    return dataset
@@ -1,86 +1,29 @@
 # forecast/train_forecast_model.py
-import os
-import numpy as np
-import pandas as pd
-from django.conf import settings
-from joblib import dump
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
-from xgboost import XGBRegressor
-from products.models import Product
-from outflows.models import Outflow
-from django.db.models import Sum  # IMPORT CORRETO PARA AGGREGATE
+from forecast import registry
+from forecast.forecast_pipeline import train_forecast_model as train_pipeline_model
 
-MODEL_PATH = os.path.join(settings.BASE_DIR, "forecast", "trained_model.pkl")
 
 def train_forecast_model():
+    """
+    Atalho do treino completo: usa o mesmo pipeline do retrain_forecast_model
+    (features de séries temporais, FEATURE_SET gravado no registro).
+    """
     print("Iniciando treinamento do modelo de previsão de demanda...")
 
-    products = Product.objects.all()
-    if not products.exists():
+    metrics = train_pipeline_model()
+    if metrics is None:
         print("Nenhum produto encontrado.")
         return None
 
-    # Preparar DataFrame com features
-    data = []
-    for product in products:
-        total_outflow = Outflow.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
-        promo_outflow = Outflow.objects.filter(product=product, promotion=True).aggregate(total=Sum('quantity'))['total'] or 0
-
-        data.append({
-            'quantity': product.quantity or 0,
-            'cost_price': product.cost_price or 0,
-            'selling_price': product.selling_price or 0,
-            'total_outflow': total_outflow,
-            'promo_outflow': promo_outflow,
-            'target': total_outflow  # variável alvo
-        })
-
-    df = pd.DataFrame(data)
-    if df.empty:
-        print("DataFrame vazio, não é possível treinar.")
-        return None
-
-    X = df[['quantity', 'cost_price', 'selling_price', 'total_outflow', 'promo_outflow']]
-    y = df['target']
-
-    # Normalização
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-
-    # Divisão treino/teste
-    X_train, X_test, y_train, y_test = train_test_split(
-        X_scaled, y, test_size=0.2, random_state=42
+    print("Modelo treinado com sucesso!")
+    print(
+        f"R²: {metrics['r2']:.2f}, RMSE: {metrics['rmse']:.2f}, "
+        f"MAE: {metrics['mae']:.2f}, MAPE: {metrics['mape']:.2f}%"
     )
-
-    # Treinar modelo
-    model = XGBRegressor(
-        n_estimators=200,
-        learning_rate=0.1,
-        max_depth=5,
-        random_state=42
-    )
-    model.fit(X_train, y_train)
-
-    # Avaliação
-    y_pred = model.predict(X_test)
-    mae = mean_absolute_error(y_test, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_test, y_pred))  # CALCULANDO RMSE MANUALMENTE
-    r2 = r2_score(y_test, y_pred)
-
-    # Cálculo do MAPE
-    mape = np.mean(np.abs((y_test - y_pred) / np.maximum(y_test, 1))) * 100  # evita divisão por zero
-
-    print(f"Modelo treinado com sucesso!")
-    print(f"R²: {r2:.2f}, RMSE: {rmse:.2f}, MAE: {mae:.2f}, MAPE: {mape:.2f}%")
-
-    # Salvar modelo + scaler
-    dump({"model": model, "scaler": scaler}, MODEL_PATH)
-    print(f"Modelo salvo em: {MODEL_PATH}")
+    print(f"Modelo salvo em: {registry.version_path(registry.current_version())}")
 
     # Retornar métricas para a view
-    return {"r2": r2, "rmse": rmse, "mae": mae, "mape": mape}
+    return metrics
 
 if __name__ == "__main__":
     train_forecast_model()
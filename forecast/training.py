@@ -0,0 +1,97 @@
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from xgboost import XGBRegressor
+from xgboost.callback import TrainingCallback
+
+# Este módulo não importa Django: fit_model roda em processos 'spawn' do pool
+# de treino segmentado sem precisar de django.setup.
+
+MODEL_PARAMS = {
+    'n_estimators': 200,
+    'learning_rate': 0.1,
+    'max_depth': 5,
+    'random_state': 42,
+}
+
+
+def evaluate(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    mae = mean_absolute_error(y_test, y_pred)
+    rmse = np.sqrt(mean_squared_error(y_test, y_pred))
+    r2 = r2_score(y_test, y_pred)
+    mape = np.mean(np.abs((y_test - y_pred) / np.where(y_test != 0, y_test, 1))) * 100
+    return {"r2": r2, "rmse": rmse, "mae": mae, "mape": mape}
+
+
+# -------------------------
+# Ajusta scaler + XGBRegressor e avalia em 20% dos dados
+# -------------------------
+def fit_model(X, y, params=None, key=None):
+    """
+    Treina um modelo (global ou de um segmento). Retorna
+    (key, modelo, scaler, métricas, linhas de treino).
+    """
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
+
+    model = XGBRegressor(**dict(MODEL_PARAMS, **(params or {})))
+    model.fit(X_train, y_train)
+
+    return key, model, scaler, evaluate(model, X_test, y_test), int(len(y))
+
+
+# -------------------------
+# Um fold da busca de hiperparâmetros (roda no pool, dados enviados uma vez
+# por processo pelo initializer)
+# -------------------------
+_fold_data = {}
+
+
+def init_fold_data(X, y, seed=42):
+    _fold_data['X'] = X
+    _fold_data['y'] = y
+    _fold_data['order'] = np.random.default_rng(seed).permutation(len(y))
+
+
+class StopAtDeadline(TrainingCallback):
+    """Interrompe o boosting quando time.time() passa de `deadline`."""
+
+    def __init__(self, deadline):
+        super().__init__()
+        self.deadline = deadline
+
+    def after_iteration(self, model, epoch, evals_log):
+        return time.time() >= self.deadline
+
+
+def score_fold(key, params, fold, n_folds, n_rows, early_stopping_rounds, deadline=None):
+    """
+    Treina com early stopping nas primeiras `n_rows` linhas (ordem embaralhada)
+    fora do fold e valida no fold. Retorna (key, fold, rmse, melhor iteração).
+    Com `deadline` (time.time()), o treino para na primeira iteração depois
+    dele; o resultado de um fold interrompido é descartado pela busca.
+    """
+    X, y = _fold_data['X'], _fold_data['y']
+    rows = _fold_data['order'][:n_rows]
+    in_fold = np.arange(len(rows)) % n_folds == fold
+    train, valid = rows[~in_fold], rows[in_fold]
+
+    model = XGBRegressor(**dict(
+        MODEL_PARAMS, **params,
+        early_stopping_rounds=early_stopping_rounds, eval_metric='rmse',
+        callbacks=[StopAtDeadline(deadline)] if deadline else None,
+    ))
+    model.fit(X[train], y[train], eval_set=[(X[valid], y[valid])], verbose=False)
+    try:
+        return key, fold, float(model.best_score), int(model.best_iteration)
+    except AttributeError:
+        # parado pelo prazo antes do early stopping registrar o melhor ponto
+        history = model.evals_result()['validation_0']['rmse']
+        best_iteration = int(np.argmin(history))
+        return key, fold, float(history[best_iteration]), best_iteration
@@ -0,0 +1,132 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+import numpy as np
+from django.conf import settings
+
+from .training import init_fold_data, score_fold
+
+BUDGET_SECONDS = getattr(settings, 'FORECAST_TUNING_BUDGET_SECONDS', 300)
+CANDIDATES = 27
+ETA = 3  # a cada rodada fica 1/ETA dos candidatos, com ETA vezes mais linhas
+N_FOLDS = 3
+MAX_TREES = 1000
+EARLY_STOPPING_ROUNDS = 30
+MIN_ROWS = 2000
+
+
+def sample_params(rng):
+    """Sorteia uma combinação do espaço de busca (log-uniforme onde faz sentido)."""
+    return {
+        'max_depth': int(rng.integers(3, 9)),
+        'learning_rate': float(np.exp(rng.uniform(np.log(0.02), np.log(0.3)))),
+        'subsample': float(rng.uniform(0.6, 1.0)),
+        'colsample_bytree': float(rng.uniform(0.6, 1.0)),
+        'min_child_weight': float(np.exp(rng.uniform(0, np.log(10)))),
+        'reg_lambda': float(np.exp(rng.uniform(np.log(0.1), np.log(10)))),
+    }
+
+
+def _rung_sizes(n_rows, candidates, eta):
+    rungs = max(1, math.ceil(math.log(candidates, eta)) + 1)
+    return [max(min(MIN_ROWS, n_rows), n_rows // eta ** k) for k in reversed(range(rungs))]
+
+
+# -------------------------
+# Busca com successive halving, folds em paralelo e limite de tempo
+# -------------------------
+def tune_hyperparameters(X, y, budget_seconds=BUDGET_SECONDS, candidates=CANDIDATES, workers=None,
+                         n_folds=N_FOLDS, eta=ETA, seed=42, progress=None):
+    """
+    Successive halving: todos os candidatos começam com poucas linhas; a cada
+    rodada ficam os 1/eta melhores (RMSE médio dos folds) com eta vezes mais
+    linhas. Cada fold usa early stopping (até MAX_TREES árvores) e roda em um
+    ProcessPoolExecutor. Ao estourar `budget_seconds` as tarefas pendentes
+    são canceladas, as que estão rodando param na próxima iteração (o prazo
+    vai para o worker) e vale o melhor candidato da última rodada completa.
+
+    Retorna os parâmetros vencedores (com n_estimators = melhor iteração
+    média + 1) e um resumo da busca.
+    """
+    started = time.perf_counter()
+    deadline = time.time() + budget_seconds  # relógio comum aos processos do pool
+    rng = np.random.default_rng(seed)
+    pool_candidates = {key: sample_params(rng) for key in range(candidates)}
+    sizes = _rung_sizes(len(y), candidates, eta)
+
+    workers = max(1, min(workers or os.cpu_count() or 1, candidates * n_folds))
+    base_params = {'n_estimators': MAX_TREES, 'n_jobs': max(1, (os.cpu_count() or 1) // workers)}
+
+    best = None
+    evaluated = 0
+    rungs_done = 0
+    stopped_by_budget = False
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_fold_data,
+        initargs=(X, y, seed),
+    )
+    try:
+        for rung, n_rows in enumerate(sizes):
+            remaining = budget_seconds - (time.perf_counter() - started)
+            if remaining <= 0 or not pool_candidates:
+                stopped_by_budget = remaining <= 0
+                break
+
+            futures = [
+                pool.submit(score_fold, key, dict(base_params, **params), fold, n_folds, n_rows,
+                            EARLY_STOPPING_ROUNDS, deadline)
+                for key, params in pool_candidates.items()
+                for fold in range(n_folds)
+            ]
+            # submit cria os processos (spawn) na primeira rodada: desconta esse tempo
+            done, pending = wait(futures, timeout=max(0.0, deadline - time.time()))
+            if pending or time.time() >= deadline:
+                for future in pending:
+                    future.cancel()
+                stopped_by_budget = True
+                break  # rodada incompleta (ou com folds interrompidos) não é comparável
+
+            scores = {}
+            for future in done:
+                key, _, rmse, best_iteration = future.result()
+                scores.setdefault(key, []).append((rmse, best_iteration))
+            ranking = sorted(
+                (float(np.mean([s[0] for s in folds])), key, float(np.mean([s[1] for s in folds])))
+                for key, folds in scores.items()
+            )
+            evaluated += len(ranking)
+            rungs_done += 1
+
+            rmse, key, best_iteration = ranking[0]
+            best = {
+                'params': dict(pool_candidates[key], n_estimators=int(round(best_iteration)) + 1),
+                'cv_rmse': rmse,
+                'rows': n_rows,
+            }
+            keep = max(1, len(ranking) // eta)
+            pool_candidates = {k: pool_candidates[k] for _, k, _ in ranking[:keep]}
+            if progress:
+                progress(rung + 1, len(sizes))
+            if len(ranking) == 1:
+                break
+    finally:
+        # os folds em andamento já param no prazo: esperar não estoura o orçamento
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if best is None:
+        return None
+    return dict(
+        best,
+        evaluated=evaluated,
+        rungs=rungs_done,
+        folds=n_folds,
+        workers=workers,
+        budget_seconds=budget_seconds,
+        seconds=round(time.perf_counter() - started, 2),
+        stopped_by_budget=stopped_by_budget,
+    )
@@ -1,10 +1,14 @@
 from django.urls import path
-from .views import ForecastListView, GenerateForecastView, ExportForecastCSVView, TrainModelView
+from .views import ForecastListView, GenerateForecastView, ExportForecastCSVView, TrainModelView, ForecastJobStatusView, ForecastRunListView, ForecastPredictAPIView
 
 urlpatterns = [
     path('forecast/list/', ForecastListView.as_view(), name='forecast_list'),
     path('generate/', GenerateForecastView.as_view(), name='generate_forecast'),
     path('export/', ExportForecastCSVView.as_view(), name='export_forecast_csv'),
     path('forecast/train/', TrainModelView.as_view(), name='train_forecast_model'),  # rota para treinar modelo
+    path('jobs/<int:pk>/', ForecastJobStatusView.as_view(), name='forecast_job_status'),
+    path('runs/', ForecastRunListView.as_view(), name='forecast_run_list'),
+
+    path('api/v1/forecast/predict/', ForecastPredictAPIView.as_view(), name='forecast-predict-api-view'),
 
 ]
@@ -1,20 +1,56 @@
 from django.views.generic import TemplateView
 from django.views import View
-from django.db.models import Sum, F
-from django.http import JsonResponse, HttpResponse
+from django.db.models import Sum
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from datetime import datetime, timedelta
 from collections import defaultdict
-import csv
 
-from .models import Forecast
-from outflows.models import Outflow
-from .forecast_pipeline import run_pipeline, train_forecast_model
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from .models import Forecast, ForecastJob, ForecastRun
+from outflows.models import DailyOutflowSummary
+from .jobs import enqueue_job
+from .forecast_pipeline import predict
+from .serializers import PredictRequestSerializer
+from .timeseries import FEATURE_SET, build_inference_set, trained_horizon
+from . import prediction_cache, registry
+from products.models import Product
+from rest_framework import status
+from rest_framework.permissions import DjangoModelPermissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+import numpy as np
+from .runs import serialize_run
+from . import export
 from configs.models import ForecastConfig
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 
 
+# -------------------------
+# Vendas reais e MAPE diário
+# -------------------------
+def load_actuals(start_date, end_date):
+    """Vendas reais por (product_id, date) no período, lidas do resumo diário."""
+    rows = DailyOutflowSummary.objects.filter(date__range=(start_date, end_date)).values_list(
+        'product_id', 'date', 'qty'
+    )
+    return {(product_id, date): qty for product_id, date, qty in rows}
+
+
+def daily_mape(predicted, real_qty):
+    # 🔹 MAPE seguro
+    if real_qty == 0 and predicted == 0:
+        return 0.0
+    if real_qty == 0:
+        return None
+    diff = abs(predicted - real_qty)
+    return round((diff / real_qty) * 100, 2) if diff >= 0.01 else 0.0
+
+
 # -------------------------
 # LISTA DE PREVISÕES
 # -------------------------
@@ -33,48 +69,57 @@ class ForecastListView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView
         start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else today
         end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else today + timedelta(days=30)
 
-        forecasts = Forecast.objects.filter(date__range=(start_date, end_date)).select_related('product')
+        forecasts = Forecast.objects.filter(date__range=(start_date, end_date))
+        forecast_list = list(forecasts.select_related('product'))
+
+        # Vendas reais do período em uma única consulta: (product_id, date) -> qty
+        actuals = load_actuals(start_date, end_date)
 
         # -------------------------
-        # Calcular MAPE individual e agrupar por data
+        # Uma única passada em memória: MAPE individual, agrupamento por data,
+        # KPIs, top produtos, linha real × previsto e heatmap
         # -------------------------
         forecasts_by_date = defaultdict(list)
         mape_list = []
-
-        for f in forecasts:
-            real_qty = Outflow.objects.filter(
-                product=f.product,
-                created_at__date=f.date
-            ).aggregate(total=Sum('quantity'))['total'] or 0
-
-            # 🔹 MAPE seguro
-            if real_qty == 0 and f.predicted_quantity == 0:
-                f.daily_mape = 0.0
-            elif real_qty == 0:
-                f.daily_mape = None
-            else:
-                diff = abs(f.predicted_quantity - real_qty)
-                f.daily_mape = round((diff / real_qty) * 100, 2) if diff >= 0.01 else 0.0
+        total_predicted = 0
+        products_risk = 0
+        pred_by_title = defaultdict(float)
+        real_by_date = defaultdict(int)
+        pred_by_date = defaultdict(float)
+        heatmap = [0] * 12
+
+        for f in forecast_list:
+            real_qty = actuals.get((f.product_id, f.date), 0)
+
+            f.daily_mape = daily_mape(f.predicted_quantity, real_qty)
+            if real_qty:
                 mape_list.append(f.daily_mape)
 
             forecasts_by_date[f.date].append(f)
+            total_predicted += f.predicted_quantity
+            if f.product.quantity < f.predicted_quantity:
+                products_risk += 1
+            pred_by_title[f.product.title] += f.predicted_quantity
+            real_by_date[f.date] += real_qty
+            pred_by_date[f.date] += f.predicted_quantity
+            heatmap[f.date.month - 1] += f.predicted_quantity
 
         forecasts_by_date = dict(sorted(forecasts_by_date.items()))
 
         # -------------------------
         # KPIs principais
         # -------------------------
-        total_predicted = forecasts.aggregate(total=Sum('predicted_quantity'))['total'] or 0
         avg_mape = round(sum(mape_list) / len(mape_list), 2) if mape_list else 0
-        products_risk = forecasts.filter(product__quantity__lt=F('predicted_quantity')).count()
-        last_update = forecasts.order_by('-date').first().date if forecasts.exists() else None
+        last_update = max(forecasts_by_date) if forecasts_by_date else None
 
         # -------------------------
         # Impacto de promoções
         # -------------------------
-        product_ids = forecasts.values_list('product', flat=True)
-        promo_qty = Outflow.objects.filter(product_id__in=product_ids, promotion=True).aggregate(total=Sum('quantity'))['total'] or 0
-        normal_qty = Outflow.objects.filter(product_id__in=product_ids, promotion=False).aggregate(total=Sum('quantity'))['total'] or 0
+        totals = DailyOutflowSummary.objects.filter(
+            product_id__in=forecasts.values('product_id')
+        ).aggregate(total=Sum('qty'), promo=Sum('promo_qty'))
+        promo_qty = totals['promo'] or 0
+        normal_qty = (totals['total'] or 0) - promo_qty
 
         if promo_qty + normal_qty > 0:
             promo_impact = round(promo_qty / (promo_qty + normal_qty) * 100, 2)
@@ -84,11 +129,9 @@ class ForecastListView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView
         # -------------------------
         # Dados para gráfico de barras (Top produtos previstos)
         # -------------------------
-        top_forecasts = forecasts.values('product__title') \
-                                 .annotate(total_pred=Sum('predicted_quantity')) \
-                                 .order_by('-total_pred')[:10]
-        chart_labels = [f['product__title'] for f in top_forecasts]
-        chart_data = [f['total_pred'] for f in top_forecasts]
+        top_forecasts = sorted(pred_by_title.items(), key=lambda item: item[1], reverse=True)[:10]
+        chart_labels = [title for title, _ in top_forecasts]
+        chart_data = [total for _, total in top_forecasts]
 
         # -------------------------
         # Histórico vs Previsão (gráfico de linha)
@@ -96,30 +139,11 @@ class ForecastListView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView
         line_labels, line_real, line_forecast = [], [], []
         date_cursor = start_date
         while date_cursor <= end_date:
-            daily_forecasts = forecasts.filter(date=date_cursor)
             line_labels.append(date_cursor.strftime("%d/%m"))
-
-            daily_real = sum(
-                Outflow.objects.filter(
-                    product=f.product,
-                    created_at__date=date_cursor
-                ).aggregate(total=Sum('quantity'))['total'] or 0
-                for f in daily_forecasts
-            )
-
-            daily_pred = daily_forecasts.aggregate(total=Sum('predicted_quantity'))['total'] or 0
-            line_real.append(daily_real)
-            line_forecast.append(daily_pred)
+            line_real.append(real_by_date.get(date_cursor, 0))
+            line_forecast.append(pred_by_date.get(date_cursor, 0))
             date_cursor += timedelta(days=1)
 
-        # -------------------------
-        # Heatmap (total previsto por mês)
-        # -------------------------
-        heatmap = []
-        for month in range(1, 13):
-            month_sum = forecasts.filter(date__month=month).aggregate(total=Sum('predicted_quantity'))['total'] or 0
-            heatmap.append(month_sum)
-
         # -------------------------
         # Contexto final
         # -------------------------
@@ -146,7 +170,7 @@ class ForecastListView(LoginRequiredMixin, PermissionRequiredMixin, TemplateView
 
 
 # -------------------------
-# GERAR PREVISÕES
+# GERAR PREVISÕES (enfileira job)
 # -------------------------
 class GenerateForecastView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
@@ -156,74 +180,181 @@ class GenerateForecastView(LoginRequiredMixin, View):
             if not config:
                 return JsonResponse({"success": False, "error": "Nenhuma configuração encontrada."})
 
-            result = run_pipeline(config)
-            return JsonResponse({"success": True, "message": f"{result} previsões geradas com sucesso!"})
+            job = enqueue_job('generate', config)
+            return JsonResponse({
+                "success": True,
+                "job_id": job.id,
+                "status_url": reverse('forecast_job_status', args=[job.id]),
+                "message": "Geração de previsões enfileirada.",
+            })
         except Exception as e:
             return JsonResponse({"success": False, "error": str(e)})
 
 # -------------------------
-# EXPORTAR CSV
+# EXPORTAR CSV / CSV.GZ / PARQUET (streaming)
 # -------------------------
 class ExportForecastCSVView(LoginRequiredMixin, View):
+    FORMATS = {
+        'csv': ('text/csv', 'csv'),
+        'csv.gz': ('application/gzip', 'csv.gz'),
+        'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    }
+
     def get(self, request, *args, **kwargs):
         start_date_str = request.GET.get('start_date')
         end_date_str = request.GET.get('end_date')
+        export_format = request.GET.get('format', 'csv')
 
         today = datetime.today().date()
         start_date = datetime.strptime(start_date_str, "%Y-%m-%d").date() if start_date_str else today
         end_date = datetime.strptime(end_date_str, "%Y-%m-%d").date() if end_date_str else today + timedelta(days=30)
 
-        forecasts = Forecast.objects.filter(date__range=(start_date, end_date)).select_related('product')
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = f'attachment; filename="forecast_{start_date}_{end_date}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Produto', 'Data', 'Previsto', 'Estoque', 'MAPE'])
-
-        for f in forecasts:
-            real_qty = Outflow.objects.filter(
-                product=f.product,
-                created_at__date=f.date
-            ).aggregate(total=Sum('quantity'))['total'] or 0
-
-            # 🔹 MAPE seguro para CSV
-            if real_qty == 0 and f.predicted_quantity == 0:
-                mape_val = 0.0
-            elif real_qty == 0:
-                mape_val = None
-            else:
-                diff = abs(f.predicted_quantity - real_qty)
-                mape_val = round((diff / real_qty) * 100, 2) if diff >= 0.01 else 0.0
-
-            writer.writerow([
-                f.product.title,
-                f.date,
-                f.predicted_quantity,
-                f.product.quantity,
-                mape_val if mape_val is not None else '-'
-            ])
+        if export_format not in self.FORMATS:
+            return JsonResponse({"success": False, "error": f"Formato inválido: {export_format}"}, status=400)
+        if export_format == 'parquet' and export.pa is None:
+            return JsonResponse({"success": False, "error": "Exportação Parquet requer o pacote pyarrow."}, status=400)
 
+        rows = export.iter_forecast_rows(start_date, end_date, daily_mape)
+        if export_format == 'csv':
+            content = export.iter_csv(rows)
+        elif export_format == 'csv.gz':
+            content = export.iter_gzip(export.iter_csv(rows))
+        else:
+            content = export.iter_parquet(rows)
+
+        content_type, extension = self.FORMATS[export_format]
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="forecast_{start_date}_{end_date}.{extension}"'
         return response
 
 
 # -------------------------
-# TREINAR MODELO VIA AJAX
+# TREINAR MODELO VIA AJAX (enfileira job)
 # -------------------------
 @method_decorator(csrf_exempt, name='dispatch')
 class TrainModelView(LoginRequiredMixin, View):
     def post(self, request, *args, **kwargs):
         try:
-            metrics = train_forecast_model()
-            if metrics:
-                message = (
-                    f"Modelo treinado! R²: {metrics['r2']:.2f}, "
-                    f"RMSE: {metrics['rmse']:.2f}, "
-                    f"MAE: {metrics['mae']:.2f}, "
-                    f"MAPE: {metrics['mape']:.2f}%"
-                )
-            else:
-                message = "Treinamento não foi executado (dados insuficientes)."
-            return JsonResponse({"success": True, "message": message})
+            # Retreino completo por padrão; mode=incremental continua o modelo atual,
+            # mode=tune busca hiperparâmetros antes de treinar
+            kinds = {'incremental': 'train_incremental', 'tune': 'train_tuned'}
+            kind = kinds.get(request.POST.get('mode'), 'train')
+            job = enqueue_job(kind)
+            return JsonResponse({
+                "success": True,
+                "job_id": job.id,
+                "status_url": reverse('forecast_job_status', args=[job.id]),
+                "message": "Treinamento enfileirado.",
+            })
         except Exception as e:
             return JsonResponse({"success": False, "error": str(e)})
+
+
+# -------------------------
+# STATUS DE UM JOB
+# -------------------------
+class ForecastJobStatusView(LoginRequiredMixin, View):
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(ForecastJob, pk=pk)
+        return JsonResponse({
+            "job_id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "stage": job.stage,
+            "progress": job.progress,
+            "result": job.result,
+            "error": job.error,
+        })
+
+
+# -------------------------
+# Histórico de execuções do pipeline (JSON)
+# -------------------------
+class ForecastRunListView(LoginRequiredMixin, View):
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.GET.get('limit', 20)), 1), 200)
+            config_id = int(request.GET['config']) if request.GET.get('config') else None
+        except ValueError:
+            return JsonResponse({"success": False, "error": "Parâmetros inválidos."}, status=400)
+
+        runs = ForecastRun.objects.all()
+        if config_id is not None:
+            runs = runs.filter(config_id=config_id)
+        return JsonResponse({"success": True, "runs": [serialize_run(run) for run in runs[:limit]]})
+
+
+# -------------------------
+# API: previsão sob demanda para uma lista de produtos
+# -------------------------
+class ForecastViewPermission(DjangoModelPermissions):
+    # POST só lê previsões: exige view_forecast em vez de add_forecast
+    perms_map = dict(DjangoModelPermissions.perms_map, POST=['%(app_label)s.view_%(model_name)s'])
+
+
+class ForecastPredictAPIView(APIView):
+    """
+    Recebe {"product_ids": [...], "horizon": 30} e devolve a demanda prevista
+    de hoje até hoje + horizon - 1, em formato colunar: uma linha de
+    `predictions` por produto (na ordem de `product_ids`), uma coluna por data.
+    Usa o modelo em memória (registry.load_current); os produtos ainda fora do
+    cache de previsões saem de um único build_inference_set + predict.
+    """
+    queryset = Forecast.objects.none()
+    permission_classes = (ForecastViewPermission,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = PredictRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = list(dict.fromkeys(serializer.validated_data['product_ids']))
+        horizon = serializer.validated_data['horizon']
+
+        model_data = registry.load_current()
+        if model_data is None:
+            return Response({'detail': 'Nenhum modelo treinado.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        meta = model_data['meta']
+        if meta.get('feature_set') != FEATURE_SET:
+            return Response(
+                {'detail': 'Modelo não treinado para o conjunto de features atual.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        if horizon > trained_horizon(meta):
+            return Response(
+                {'horizon': [f'O modelo atual foi treinado para até {trained_horizon(meta)} dias.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        include_promotions = meta.get('include_promotions', True)
+        segment_by = meta.get('segment_by')
+
+        origin = timezone.localdate() - timedelta(days=1)
+        dates = np.datetime64(origin, 'D') + np.arange(1, horizon + 1)
+
+        def compute(product_ids):
+            dataset = build_inference_set(
+                dates,
+                include_promotions=include_promotions,
+                segment_by=segment_by,
+                origin_date=origin,
+                products=Product.objects.filter(id__in=product_ids),
+            )
+            if dataset is None:
+                return [], []
+            return dataset['product_ids'].tolist(), predict(model_data, dataset).reshape(-1, horizon)
+
+        found, missing = prediction_cache.get_predictions(
+            (model_data['version'], origin, include_promotions, segment_by), requested, horizon, compute,
+        )
+        product_ids = [product_id for product_id in requested if product_id in found]
+        predictions = (
+            np.round(np.array([found[product_id] for product_id in product_ids], dtype=np.float64), 3)
+            if product_ids else np.zeros((0, horizon))
+        )
+
+        return Response({
+            'model_version': model_data['version'],
+            'origin': origin.isoformat(),
+            'dates': [str(d) for d in dates],
+            'product_ids': product_ids,
+            'predictions': predictions.tolist(),
+            'missing': missing,
+        })
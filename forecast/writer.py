@@ -0,0 +1,48 @@
+import logging
+import time
+from django.db import transaction
+from .models import Forecast
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+
+# -------------------------
+# Grava previsões em lote (upsert por produto + data)
+# -------------------------
+def write_forecasts(product_ids, dates, quantities, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Faz upsert das previsões em blocos usando a restrição única (product, date).
+
+    Cada bloco é um único INSERT ... ON CONFLICT DO UPDATE dentro da sua própria
+    transação. Se `on_chunk` for informado, é chamado com (gravadas, total)
+    após cada bloco. Retorna um dicionário com linhas gravadas, tempo total e
+    linhas por segundo.
+    """
+    started = time.perf_counter()
+    total = len(product_ids)
+    written = 0
+
+    for offset in range(0, total, chunk_size):
+        end = offset + chunk_size
+        objs = [
+            Forecast(product_id=int(pid), date=date, predicted_quantity=float(qty))
+            for pid, date, qty in zip(product_ids[offset:end], dates[offset:end], quantities[offset:end])
+        ]
+        with transaction.atomic():
+            Forecast.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=['product', 'date'],
+                update_fields=['predicted_quantity'],
+            )
+        written += len(objs)
+        if on_chunk:
+            on_chunk(written, total)
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = written / elapsed if elapsed > 0 else float(written)
+    logger.info("Previsões gravadas: %d linhas em %.2fs (%.0f linhas/s)", written, elapsed, rows_per_second)
+
+    return {'rows': written, 'seconds': elapsed, 'rows_per_second': rows_per_second}
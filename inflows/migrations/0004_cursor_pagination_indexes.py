@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:15
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('inflows', '0003_inflow_cost_price'),
+        ('products', '0003_inventorytotals'),
+        ('suppliers', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='inflow',
+            index=models.Index(fields=['-created_at', '-id'], name='inflow_created_id_idx'),
+        ),
+    ]
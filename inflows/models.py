@@ -1,6 +1,7 @@
 from django.db import models
 from products.models import Product
 from suppliers.models import Supplier
+from products.stock import reprice
 
 class Inflow(models.Model):
     supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name='inflows')
@@ -13,13 +14,15 @@ class Inflow(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # listagem da API (paginação por cursor)
+            models.Index(fields=['-created_at', '-id'], name='inflow_created_id_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        # Atualiza o preço de custo e salva o último custo
-        self.product.last_cost_price = self.product.cost_price
-        self.product.cost_price = self.cost_price
-        self.product.save()
-        
+        # Atualiza o preço de custo e salva o último custo (UPDATE só dessas colunas)
+        reprice(self.product, self.cost_price)
+
         super().save(*args, **kwargs)
 
     def __str__(self):
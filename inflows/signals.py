@@ -1,12 +1,11 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from inflows.models import Inflow
+from products.stock import increment_stock
 
 @receiver(post_save, sender=Inflow)
 def update_product_quantity(sender, instance, created, **kwargs):
     if created:
         if instance.quantity > 0:
-            product = instance.product
-            product.quantity += instance.quantity
-            product.save()
+            increment_stock(instance.product, instance.quantity)
 
@@ -1,4 +1,5 @@
 from rest_framework import generics
+from app.pagination import CreatedAtCursorPagination
 from django.views.generic import ListView, CreateView, DetailView
 from django.urls import reverse_lazy
 from . import models, forms, serializers
@@ -35,6 +36,7 @@ class InflowDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
 class InflowCreateListAPIView(generics.ListCreateAPIView):
     queryset = models.Inflow.objects.all()
     serializer_class = serializers.InflowSerializer
+    pagination_class = CreatedAtCursorPagination
 
 
 class InflowRetrieveAPIView(generics.RetrieveAPIView):
@@ -0,0 +1,116 @@
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from rest_framework import serializers
+
+from app.dashboard_cache import bump_generation
+from forecast.mape import mark_dirty_many
+from outflows.models import Outflow
+from outflows.rollup import outflow_date, refresh_days
+from products.models import Product
+from products.totals import apply_product_deltas
+
+MAX_ITEMS = getattr(settings, 'OUTFLOW_BULK_MAX_ITEMS', 5000)
+
+
+class OutflowBulkItemSerializer(serializers.Serializer):
+    # product como inteiro: a existência é conferida em uma única consulta
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField()
+    promotion = serializers.BooleanField(default=False)
+    description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+
+# -------------------------
+# Ingestão de saídas em lote
+# -------------------------
+def ingest_outflows(items):
+    """
+    Valida e grava um lote de saídas em uma transação:
+    bulk_create das saídas, uma baixa de estoque agrupada por produto e a
+    manutenção dos dados derivados (resumo diário, MAPE, totais, cache do
+    dashboard) uma única vez. Retorna o resultado por item e a vazão.
+    """
+    started = time.perf_counter()
+    results = [None] * len(items)
+    valid = []
+
+    for index, item in enumerate(items):
+        serializer = OutflowBulkItemSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+    products = Product.objects.in_bulk({data['product'] for _, data in valid})
+    accepted = []
+    for index, data in valid:
+        if data['product'] not in products:
+            results[index] = {
+                'index': index, 'status': 'error',
+                'errors': {'product': [f"Produto {data['product']} não encontrado."]},
+            }
+        else:
+            accepted.append((index, data))
+
+    decrements = defaultdict(int)
+    for _, data in accepted:
+        if data['quantity'] > 0:
+            decrements[data['product']] += data['quantity']
+
+    with transaction.atomic():
+        # Trava os produtos em ordem de pk antes de qualquer escrita: lotes
+        # concorrentes com produtos em comum esperam um pelo outro em vez de
+        # travar em ordens diferentes (deadlock). Os preços saem da mesma leitura.
+        prices = list(
+            Product.objects.select_for_update(no_key=True)
+            .filter(pk__in=decrements).order_by('pk')
+            .values_list('pk', 'cost_price', 'selling_price')
+        )
+
+        outflows = Outflow.objects.bulk_create([
+            Outflow(
+                product_id=data['product'],
+                quantity=data['quantity'],
+                promotion=data['promotion'],
+                description=data.get('description'),
+            )
+            for _, data in accepted
+        ])
+
+        # Baixa de estoque: um UPDATE com CASE por produto (linhas já travadas)
+        if decrements:
+            Product.objects.filter(pk__in=decrements).update(
+                quantity=F('quantity') - Case(
+                    *[When(pk=pk, then=Value(qty)) for pk, qty in decrements.items()],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                updated_at=timezone.now(),
+            )
+            apply_product_deltas({
+                pk: (-decrements[pk], -decrements[pk] * cost_price, -decrements[pk] * selling_price)
+                for pk, cost_price, selling_price in prices
+            })
+
+        # Dados derivados, uma vez por lote
+        days = {(outflow.product_id, outflow_date(outflow.created_at)) for outflow in outflows}
+        refresh_days(days)
+        mark_dirty_many(days)
+        if outflows:
+            transaction.on_commit(bump_generation)
+
+    for (index, _), outflow in zip(accepted, outflows):
+        results[index] = {'index': index, 'status': 'created', 'id': outflow.pk}
+
+    elapsed = time.perf_counter() - started
+    return {
+        'created': len(outflows),
+        'failed': len(items) - len(outflows),
+        'seconds': round(elapsed, 4),
+        'rows_per_second': round(len(outflows) / elapsed, 1) if elapsed > 0 else None,
+        'results': results,
+    }
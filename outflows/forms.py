@@ -1,5 +1,7 @@
 from django import forms
+from django.db import transaction
 from . import models
+from products.stock import decrement_stock
 
 class OutflowForm(forms.ModelForm):
     class Meta:
@@ -18,12 +20,23 @@ class OutflowForm(forms.ModelForm):
             'description': 'Descrição',
         }
 
-    def clean_quantity(self):
-        quantity = self.cleaned_data.get('quantity')
-        product = self.cleaned_data.get('product')
+    def save(self, commit=True):
+        """
+        Baixa o estoque com um UPDATE condicional (quantity >= n) na mesma
+        transação da saída. Sem saldo, nada é gravado e levanta
+        ValidationError no campo quantity (a view a devolve ao form).
+        """
+        outflow = super().save(commit=False)
+        if not commit:
+            return outflow
 
-        if quantity > product.quantity:
-            raise forms.ValidationError(
-                f'A quantidade disponível em estoque para o produto {product.title} é de {product.quantity} unidades.'
-            )
-        return quantity    
\ No newline at end of file
+        product = outflow.product
+        with transaction.atomic():
+            if outflow.quantity > 0 and not decrement_stock(product, outflow.quantity, conditional=True):
+                product.refresh_from_db(fields=['quantity'])
+                raise forms.ValidationError({'quantity': (
+                    f'A quantidade disponível em estoque para o produto {product.title} é de {product.quantity} unidades.'
+                )})
+            outflow._stock_applied = True
+            outflow.save()
+        return outflow
@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from forecast.benchmark import ensure_benchmark_database
+from outflows.forms import OutflowForm
+from outflows.models import Outflow
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria saídas concorrentes para um mesmo produto e confere se nenhuma baixa "
+        "de estoque foi perdida. Use --legacy para comparar com a baixa por read-modify-save. "
+        "Grava saídas e baixa estoque de verdade: só roda em uma base dedicada "
+        "(--settings=app.settings_benchmark)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', type=int)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--outflows', type=int, default=500, help="Total de saídas a criar.")
+        parser.add_argument('--legacy', action='store_true',
+                            help="Baixa lendo o produto e chamando product.save() (comportamento antigo).")
+
+    def _create_outflow(self, product_id, legacy):
+        try:
+            if legacy:
+                product = Product.objects.get(pk=product_id)
+                product.quantity -= 1
+                product.save()
+                outflow = Outflow(product=product, quantity=1, description='benchmark')
+                outflow._stock_applied = True
+                outflow.save()
+                return True
+
+            form = OutflowForm(data={'product': product_id, 'quantity': 1, 'description': 'benchmark'})
+            if not form.is_valid():
+                return False
+            form.save()
+            return True
+        except ValidationError:
+            return False
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        try:
+            ensure_benchmark_database()
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        product_id = options['product_id']
+        total = options['outflows']
+
+        product = Product.objects.filter(pk=product_id).first()
+        if product is None:
+            raise CommandError(f"Produto {product_id} não encontrado.")
+        if product.quantity < total:
+            raise CommandError(f"Estoque insuficiente: {product.quantity} < {total}.")
+        initial = product.quantity
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            results = list(pool.map(
+                lambda _: self._create_outflow(product_id, options['legacy']), range(total)
+            ))
+        elapsed = time.perf_counter() - started
+
+        created = sum(results)
+        final = Product.objects.values_list('quantity', flat=True).get(pk=product_id)
+        lost = (initial - created) - final
+
+        self.stdout.write(f"Saídas criadas: {created}/{total} em {elapsed:.2f}s ({created / elapsed:.0f} saídas/s)")
+        self.stdout.write(f"Estoque: inicial {initial}, final {final}, esperado {initial - created}")
+        if lost:
+            self.stdout.write(self.style.ERROR(f"Baixas perdidas: {abs(lost)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Nenhuma baixa perdida."))
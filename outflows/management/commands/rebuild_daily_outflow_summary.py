@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from outflows.rollup import rebuild_daily_summary
+
+
+class Command(BaseCommand):
+    help = "Recria a tabela de resumo diário de saídas (produto × dia) a partir das saídas brutas."
+
+    def handle(self, *args, **options):
+        created = rebuild_daily_summary()
+        self.stdout.write(self.style.SUCCESS(f"{created} linhas de resumo diário criadas."))
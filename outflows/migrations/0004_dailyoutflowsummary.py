@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def populate_summary(apps, schema_editor):
+    Outflow = apps.get_model('outflows', 'Outflow')
+    DailyOutflowSummary = apps.get_model('outflows', 'DailyOutflowSummary')
+
+    grouped = (
+        Outflow.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('product_id', 'day')
+        .annotate(
+            total=Coalesce(Sum('quantity'), 0),
+            promo_total=Coalesce(Sum('quantity', filter=Q(promotion=True)), 0),
+            rows=Count('id'),
+        )
+    )
+    DailyOutflowSummary.objects.bulk_create(
+        (
+            DailyOutflowSummary(
+                product_id=row['product_id'], date=row['day'],
+                qty=row['total'], promo_qty=row['promo_total'], count=row['rows'],
+            )
+            for row in grouped.iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outflows', '0003_outflow_promotion'),
+        ('products', '0002_product_last_cost_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOutflowSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('qty', models.IntegerField(default=0)),
+                ('promo_qty', models.IntegerField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_outflows', to='products.product')),
+            ],
+            options={
+                'ordering': ['product', 'date'],
+                'unique_together': {('product', 'date')},
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
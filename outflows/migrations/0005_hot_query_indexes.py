@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:59
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não trava escritas nas tabelas grandes, mas não
+    # pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('outflows', '0004_dailyoutflowsummary'),
+        ('products', '0003_inventorytotals'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='dailyoutflowsummary',
+            index=models.Index(fields=['date', 'product'], include=('qty',), name='dailyoutflow_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='outflow',
+            index=models.Index(fields=['product', 'created_at'], name='outflow_product_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='outflow',
+            index=models.Index(fields=['-created_at'], name='outflow_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='outflow',
+            index=models.Index(fields=['updated_at'], name='outflow_updated_idx'),
+        ),
+    ]
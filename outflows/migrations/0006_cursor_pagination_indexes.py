@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:15
+
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('outflows', '0005_hot_query_indexes'),
+        ('products', '0003_inventorytotals'),
+    ]
+
+    operations = [
+        # cria o novo antes de remover o antigo: a tabela nunca fica sem índice em created_at
+        AddIndexConcurrently(
+            model_name='outflow',
+            index=models.Index(fields=['-created_at', '-id'], name='outflow_created_id_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='outflow',
+            name='outflow_created_idx',
+        ),
+    ]
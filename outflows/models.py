@@ -11,7 +11,35 @@ class Outflow(models.Model):
 
     class Meta: 
         ordering = ['-created_at']
+        indexes = [
+            # resumo diário (refresh_days): saídas de alguns produtos em um intervalo de datas
+            models.Index(fields=['product', 'created_at'], name='outflow_product_created_idx'),
+            # listagens (paginação por cursor) e último registro do dashboard por período
+            models.Index(fields=['-created_at', '-id'], name='outflow_created_id_idx'),
+            # marca d'água do retreino incremental
+            models.Index(fields=['updated_at'], name='outflow_updated_idx'),
+        ]
     
     def __str__(self):
         return str(self.product)
 
+
+
+class DailyOutflowSummary(models.Model):
+    """Totais de saídas por produto e dia, mantidos pelos signals de Outflow."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_outflows')
+    date = models.DateField()
+    qty = models.IntegerField(default=0)
+    promo_qty = models.IntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('product', 'date')
+        ordering = ['product', 'date']
+        indexes = [
+            # vendas reais por período (previsões, dashboard)
+            models.Index(fields=['date', 'product'], include=['qty'], name='dailyoutflow_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product} - {self.date}"
@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from outflows.models import DailyOutflowSummary, Outflow
+
+CHUNK_SIZE = 5000
+
+
+def outflow_date(created_at):
+    # Mesmo critério do lookup created_at__date (fuso horário atual)
+    return timezone.localdate(created_at)
+
+
+# -------------------------
+# Aplica um delta no resumo diário (produto × dia)
+# -------------------------
+def apply_delta(product_id, date, qty, promo_qty, count):
+    """Soma o delta na linha (product, date) com UPDATE ... SET x = x + delta, criando-a se preciso."""
+    changes = dict(qty=F('qty') + qty, promo_qty=F('promo_qty') + promo_qty, count=F('count') + count)
+    rows = DailyOutflowSummary.objects.filter(product_id=product_id, date=date)
+
+    if rows.update(**changes):
+        if count < 0:
+            # remove dias que ficaram sem nenhuma saída
+            rows.filter(count__lte=0).delete()
+        return
+    try:
+        with transaction.atomic():
+            DailyOutflowSummary.objects.create(
+                product_id=product_id, date=date, qty=qty, promo_qty=promo_qty, count=count
+            )
+    except IntegrityError:
+        # outra transação criou a linha nesse meio tempo
+        rows.update(**changes)
+
+
+def apply_outflow(product_id, created_at, quantity, promotion, sign=1):
+    apply_delta(
+        product_id,
+        outflow_date(created_at),
+        sign * quantity,
+        sign * quantity if promotion else 0,
+        sign,
+    )
+
+
+# -------------------------
+# Reconstrói o resumo a partir das saídas brutas
+# -------------------------
+def rebuild_daily_summary(chunk_size=CHUNK_SIZE):
+    """Recria todas as linhas do resumo com um único GROUP BY (produto, dia)."""
+    grouped = (
+        Outflow.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('product_id', 'day')
+        .annotate(
+            total=Coalesce(Sum('quantity'), 0),
+            promo_total=Coalesce(Sum('quantity', filter=Q(promotion=True)), 0),
+            rows=Count('id'),
+        )
+    )
+
+    created = 0
+    with transaction.atomic():
+        DailyOutflowSummary.objects.all().delete()
+        batch = []
+        for row in grouped.iterator(chunk_size=chunk_size):
+            batch.append(DailyOutflowSummary(
+                product_id=row['product_id'], date=row['day'],
+                qty=row['total'], promo_qty=row['promo_total'], count=row['rows'],
+            ))
+            if len(batch) >= chunk_size:
+                DailyOutflowSummary.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        DailyOutflowSummary.objects.bulk_create(batch)
+        created += len(batch)
+
+    return created
+
+
+# -------------------------
+# Recalcula apenas alguns (produto, dia) — usado na ingestão em lote
+# -------------------------
+def refresh_days(keys):
+    """
+    Recalcula as linhas do resumo para os pares (product_id, date) em `keys`
+    com um único GROUP BY e grava tudo com um upsert em lote.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    product_ids = {product_id for product_id, _ in keys}
+    dates = sorted(date for _, date in keys)
+    start = timezone.make_aware(datetime.combine(dates[0], time.min))
+    end = timezone.make_aware(datetime.combine(dates[-1] + timedelta(days=1), time.min))
+
+    grouped = (
+        Outflow.objects.filter(product_id__in=product_ids, created_at__gte=start, created_at__lt=end)
+        .order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('product_id', 'day')
+        .annotate(
+            total=Coalesce(Sum('quantity'), 0),
+            promo_total=Coalesce(Sum('quantity', filter=Q(promotion=True)), 0),
+            rows=Count('id'),
+        )
+    )
+    rows = [
+        DailyOutflowSummary(
+            product_id=row['product_id'], date=row['day'],
+            qty=row['total'], promo_qty=row['promo_total'], count=row['rows'],
+        )
+        for row in grouped
+        if (row['product_id'], row['day']) in keys
+    ]
+    DailyOutflowSummary.objects.bulk_create(
+        rows,
+        batch_size=CHUNK_SIZE,
+        update_conflicts=True,
+        unique_fields=['product', 'date'],
+        update_fields=['qty', 'promo_qty', 'count'],
+    )
+    return len(rows)
@@ -1,19 +1,47 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from outflows.models import Outflow
-from forecast.models import Forecast
-from django.db import models
+from outflows.rollup import apply_outflow, outflow_date
+from forecast.mape import mark_dirty
+from products.stock import decrement_stock
 
 # -------------------------
 # Atualiza quantidade do produto
 # -------------------------
 @receiver(post_save, sender=Outflow)
 def update_product_quantity(sender, instance, created, **kwargs):
-    if created:
+    # A baixa já foi feita (condicional) quando a saída veio do formulário
+    if created and not getattr(instance, '_stock_applied', False):
         if instance.quantity > 0:
-            product = instance.product
-            product.quantity -= instance.quantity
-            product.save()
+            decrement_stock(instance.product, instance.quantity)
+
+
+# -------------------------
+# Mantém o resumo diário (produto × dia)
+# Registrado antes do MAPE, que lê o resumo já atualizado.
+# -------------------------
+@receiver(pre_save, sender=Outflow)
+def remember_previous_outflow(sender, instance, **kwargs):
+    # Guarda o estado anterior para desfazer o delta em edições
+    instance._rollup_previous = None
+    if instance.pk:
+        instance._rollup_previous = Outflow.objects.filter(pk=instance.pk).values_list(
+            'product_id', 'created_at', 'quantity', 'promotion'
+        ).first()
+
+
+@receiver(post_save, sender=Outflow)
+def update_daily_summary_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_rollup_previous', None)
+    if not created and previous:
+        product_id, created_at, quantity, promotion = previous
+        apply_outflow(product_id, created_at, quantity, promotion, sign=-1)
+    apply_outflow(instance.product_id, instance.created_at, instance.quantity, instance.promotion)
+
+
+@receiver(post_delete, sender=Outflow)
+def update_daily_summary_on_delete(sender, instance, **kwargs):
+    apply_outflow(instance.product_id, instance.created_at, instance.quantity, instance.promotion, sign=-1)
 
 
 # -------------------------
@@ -22,27 +50,11 @@ def update_product_quantity(sender, instance, created, **kwargs):
 @receiver([post_save, post_delete], sender=Outflow)
 def update_forecast_mape(sender, instance, **kwargs):
     """
-    Atualiza o daily_mape da Forecast relacionada ao produto e data
-    sempre que um Outflow é criado, atualizado ou deletado.
+    Marca o (produto, dia) da saída para recálculo do daily_mape. O recálculo
+    acontece uma vez por transação, no commit, para todas as chaves marcadas.
     """
-    product = instance.product
-    date = instance.created_at.date()  # assume que created_at é DateTimeField
-
-    try:
-        forecast = Forecast.objects.get(product=product, date=date)
-    except Forecast.DoesNotExist:
-        return  # não existe previsão para essa data, nada a fazer
-
-    # Soma total de saídas reais do produto na data da previsão
-    real_qty = Outflow.objects.filter(
-        product=product,
-        created_at__date=date
-    ).aggregate(total=models.Sum('quantity'))['total'] or 0
-
-    # Calcula MAPE se houver vendas reais
-    if real_qty > 0:
-        forecast.daily_mape = abs((real_qty - forecast.predicted_quantity) / real_qty) * 100
-    else:
-        forecast.daily_mape = None
-
-    forecast.save()
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        product_id, created_at = previous[:2]
+        mark_dirty(product_id, outflow_date(created_at))
+    mark_dirty(instance.product_id, outflow_date(instance.created_at))
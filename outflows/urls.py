@@ -7,6 +7,7 @@ urlpatterns = [
     path('outflows/<int:pk>/detail', views.OutflowDetailView.as_view(), name='outflow_detail'),
 
     path('api/v1/outflows/', views.OutflowCreateListAPIView.as_view(), name='outflow-create-list-api-view'),
+    path('api/v1/outflows/bulk/', views.OutflowBulkCreateAPIView.as_view(), name='outflow-bulk-create-api-view'),
     path('api/v1/outflows/<int:pk>/', views.OutflowRetrieveAPIView.as_view(), name='outflow-detail-api-view')
    
 ]
\ No newline at end of file
@@ -1,7 +1,11 @@
-from rest_framework import generics
+from rest_framework import generics, status
+from app.pagination import CreatedAtCursorPagination
+from rest_framework.response import Response
 from django.views.generic import ListView, CreateView, DetailView
 from django.urls import reverse_lazy
-from . import models, forms, serializers
+from django.shortcuts import redirect
+from django.core.exceptions import ValidationError
+from . import models, forms, serializers, bulk
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 
 class OutflowListView(LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -27,6 +31,15 @@ class OutflowCreateView(LoginRequiredMixin, PermissionRequiredMixin, CreateView)
     success_url = reverse_lazy('outflow_list')
     permission_required = 'outflows.add_outflow'
 
+    def form_valid(self, form):
+        # A validação de saldo acontece na baixa condicional do form.save()
+        try:
+            self.object = form.save()
+        except ValidationError as e:
+            form.add_error(None, e)
+            return self.form_invalid(form)
+        return redirect(self.get_success_url())
+
 class OutflowDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView):
     model = models.Outflow
     template_name = 'outflow_detail.html'
@@ -35,6 +48,25 @@ class OutflowDetailView(LoginRequiredMixin, PermissionRequiredMixin, DetailView)
 class OutflowCreateListAPIView(generics.ListCreateAPIView):
     queryset = models.Outflow.objects.all()
     serializer_class = serializers.OutflowSerializer
+    pagination_class = CreatedAtCursorPagination
+
+
+class OutflowBulkCreateAPIView(generics.GenericAPIView):
+    queryset = models.Outflow.objects.all()
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'detail': 'Envie uma lista de saídas.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > bulk.MAX_ITEMS:
+            return Response(
+                {'detail': f'Máximo de {bulk.MAX_ITEMS} saídas por requisição.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        result = bulk.ingest_outflows(items)
+        response_status = status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(result, status=response_status)
 
 
 class OutflowRetrieveAPIView(generics.RetrieveAPIView):
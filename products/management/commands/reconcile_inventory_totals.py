@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from products.totals import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recalcula os totais do estoque a partir dos produtos e informa divergências."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Apenas informa a divergência, sem corrigir.")
+
+    def handle(self, *args, **options):
+        drift = reconcile(fix=not options['check'])
+
+        if not any(drift.values()):
+            self.stdout.write(self.style.SUCCESS("Totais do estoque conferem."))
+            return
+
+        for key, value in drift.items():
+            if value:
+                self.stdout.write(self.style.WARNING(f"{key}: divergência de {value}"))
+        if not options['check']:
+            self.stdout.write(self.style.SUCCESS("Totais corrigidos."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_last_cost_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('total_cost_value', models.DecimalField(decimal_places=2, default=0, max_digits=30)),
+                ('total_selling_value', models.DecimalField(decimal_places=2, default=0, max_digits=30)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_inventorytotals'),
+    ]
+
+    operations = [
+        # A linha única existente vira o shard 0
+        migrations.AddField(
+            model_name='inventorytotals',
+            name='shard',
+            field=models.PositiveSmallIntegerField(default=0, unique=True),
+        ),
+    ]
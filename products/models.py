@@ -21,3 +21,18 @@ class Product(models.Model):
     def __str__(self):
         return self.title    
 
+
+
+class InventoryTotals(models.Model):
+    """
+    Totais do estoque divididos em linhas (shards), mantidos por delta a cada
+    alteração de produto. O total é a soma das linhas (products.totals).
+    """
+    shard = models.PositiveSmallIntegerField(unique=True, default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    total_cost_value = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    total_selling_value = models.DecimalField(max_digits=30, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Totais do estoque ({self.updated_at})"
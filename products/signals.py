@@ -0,0 +1,27 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from products.models import Product
+from products.totals import apply_change
+
+STOCK_FIELDS = ('quantity', 'cost_price', 'selling_price')
+
+
+# -------------------------
+# Mantém os totais do estoque por delta
+# -------------------------
+@receiver(pre_save, sender=Product)
+def remember_previous_stock(sender, instance, **kwargs):
+    instance._stock_previous = None
+    if instance.pk:
+        instance._stock_previous = Product.objects.filter(pk=instance.pk).values_list(*STOCK_FIELDS).first()
+
+
+@receiver(post_save, sender=Product)
+def update_totals_on_save(sender, instance, **kwargs):
+    new = tuple(getattr(instance, field) for field in STOCK_FIELDS)
+    apply_change(getattr(instance, '_stock_previous', None), new, product_pk=instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def update_totals_on_delete(sender, instance, **kwargs):
+    apply_change(tuple(getattr(instance, field) for field in STOCK_FIELDS), None, product_pk=instance.pk)
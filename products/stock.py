@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from products.models import Product
+from products.totals import apply_delta
+
+
+# -------------------------
+# Movimentações de estoque com UPDATE atômico (só as colunas alteradas)
+# -------------------------
+def _move(product, quantity, extra_filter=None):
+    with transaction.atomic():
+        rows = Product.objects.filter(pk=product.pk, **(extra_filter or {}))
+        if not rows.update(quantity=F('quantity') + quantity, updated_at=timezone.now()):
+            return False
+        # O UPDATE direto não dispara os signals de Product: aplica o delta aqui,
+        # com os preços lidos do banco (a linha fica travada pelo UPDATE até o
+        # commit; os do objeto em memória podem estar desatualizados)
+        cost_price, selling_price = Product.objects.filter(pk=product.pk).values_list(
+            'cost_price', 'selling_price'
+        ).get()
+        apply_delta(quantity, quantity * cost_price, quantity * selling_price, product_pk=product.pk)
+    return True
+
+
+def increment_stock(product, quantity):
+    return _move(product, quantity)
+
+
+def decrement_stock(product, quantity, conditional=False):
+    """
+    Baixa `quantity` do estoque. Com conditional=True a baixa só acontece se
+    houver saldo (WHERE quantity >= n); retorna False quando não houver.
+    """
+    extra_filter = {'quantity__gte': quantity} if conditional else None
+    return _move(product, -quantity, extra_filter)
+
+
+def reprice(product, cost_price):
+    """Atualiza o preço de custo guardando o anterior em last_cost_price."""
+    with transaction.atomic():
+        # trava só esta linha para o delta de valor usar a quantidade correta
+        current = Product.objects.select_for_update().filter(pk=product.pk).values_list(
+            'quantity', 'cost_price'
+        ).first()
+        Product.objects.filter(pk=product.pk).update(
+            last_cost_price=F('cost_price'), cost_price=cost_price, updated_at=timezone.now()
+        )
+        if current:
+            quantity, old_cost = current
+            apply_delta(0, quantity * (cost_price - old_cost), 0, product_pk=product.pk)
+
+    product.last_cost_price = product.cost_price
+    product.cost_price = cost_price
@@ -1,3 +1,43 @@
+from decimal import Decimal
+
+from django.db.models import F
 from django.test import TestCase
 
-# Create your tests here.
+from brands.models import Brands
+from categories.models import Category
+from products import totals
+from products.models import InventoryTotals, Product
+from products.stock import decrement_stock, increment_stock
+
+
+class ShardedInventoryTotalsTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Categoria')
+        brand = Brands.objects.create(name='Marca')
+        self.products = [
+            Product.objects.create(
+                title=f'Produto {i}', category=category, brand=brand,
+                cost_price=Decimal('10.00'), selling_price=Decimal('15.00'), quantity=10,
+            )
+            for i in range(totals.SHARDS + 3)
+        ]
+
+    def test_totals_are_the_sum_of_the_shards(self):
+        for product in self.products:
+            increment_stock(product, 5)
+            decrement_stock(product, 2, conditional=True)
+
+        self.assertGreater(InventoryTotals.objects.exclude(total_quantity=0).count(), 1)
+        stored = totals.get_totals()
+        for key, value in totals.compute_totals().items():
+            self.assertEqual(getattr(stored, key), value)
+        self.assertEqual(stored.total_quantity, 13 * len(self.products))
+
+    def test_reconcile_moves_everything_to_shard_zero(self):
+        InventoryTotals.objects.filter(shard=1).update(total_quantity=F('total_quantity') + 999)
+
+        drift = totals.reconcile(fix=True)
+
+        self.assertEqual(drift['total_quantity'], 999)
+        self.assertFalse(InventoryTotals.objects.exclude(shard=0).exclude(total_quantity=0).exists())
+        self.assertFalse(any(totals.reconcile(fix=False).values()))
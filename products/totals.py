@@ -0,0 +1,125 @@
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Sum, DecimalField, BigIntegerField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from products.models import Product, InventoryTotals
+
+# Linhas de InventoryTotals somadas na leitura. Deltas de um mesmo produto vão
+# sempre para a mesma linha, então a ordem das travas segue a dos produtos.
+SHARDS = getattr(settings, 'INVENTORY_TOTALS_SHARDS', 16)
+
+
+def stock_values(quantity, cost_price, selling_price):
+    """(quantidade, valor de custo, valor de venda) de um produto."""
+    quantity = quantity or 0
+    return quantity, quantity * Decimal(cost_price or 0), quantity * Decimal(selling_price or 0)
+
+
+def shard_for(product_pk):
+    return (product_pk or 0) % SHARDS
+
+
+# -------------------------
+# Aplica deltas nos totais do estoque
+# -------------------------
+def apply_delta(quantity, cost_value, selling_value, product_pk=None):
+    _apply_to_shard(shard_for(product_pk), quantity, cost_value, selling_value)
+
+
+def _apply_to_shard(shard, quantity, cost_value, selling_value):
+    if not (quantity or cost_value or selling_value):
+        return
+    updated = InventoryTotals.objects.filter(shard=shard).update(
+        total_quantity=F('total_quantity') + quantity,
+        total_cost_value=F('total_cost_value') + cost_value,
+        total_selling_value=F('total_selling_value') + selling_value,
+    )
+    if not updated:
+        # primeira utilização: calcula do zero (já inclui esta alteração)
+        reconcile()
+
+
+def apply_product_deltas(deltas):
+    """
+    Aplica vários deltas de uma vez: {product_pk: (quantidade, custo, venda)}.
+    Agrupa por shard e atualiza as linhas em ordem crescente, evitando
+    deadlock entre lotes concorrentes.
+    """
+    by_shard = {}
+    for product_pk, values in deltas.items():
+        totals = by_shard.setdefault(shard_for(product_pk), [0, 0, 0])
+        for i, value in enumerate(values):
+            totals[i] += value
+    for shard in sorted(by_shard):
+        _apply_to_shard(shard, *by_shard[shard])
+
+
+def apply_change(old, new, product_pk=None):
+    """Aplica a diferença entre dois estados (quantidade, custo, venda) de um produto."""
+    old_values = stock_values(*old) if old else (0, 0, 0)
+    new_values = stock_values(*new) if new else (0, 0, 0)
+    apply_delta(*(n - o for n, o in zip(new_values, old_values)), product_pk=product_pk)
+
+
+# -------------------------
+# Recalcula do zero
+# -------------------------
+def compute_totals():
+    money = DecimalField(max_digits=30, decimal_places=2)
+    return Product.objects.aggregate(
+        total_quantity=Coalesce(Sum('quantity'), 0, output_field=BigIntegerField()),
+        total_cost_value=Coalesce(Sum(F('quantity') * F('cost_price'), output_field=money), Decimal(0), output_field=money),
+        total_selling_value=Coalesce(Sum(F('quantity') * F('selling_price'), output_field=money), Decimal(0), output_field=money),
+    )
+
+
+def sum_shards(queryset):
+    money = DecimalField(max_digits=30, decimal_places=2)
+    return queryset.aggregate(
+        total_quantity=Coalesce(Sum('total_quantity'), 0, output_field=BigIntegerField()),
+        total_cost_value=Coalesce(Sum('total_cost_value'), Decimal(0), output_field=money),
+        total_selling_value=Coalesce(Sum('total_selling_value'), Decimal(0), output_field=money),
+        updated_at=Max('updated_at'),
+        shards=Coalesce(Max('shard') + 1, 0),
+    )
+
+
+def reconcile(fix=True):
+    """
+    Recalcula os totais a partir dos produtos e retorna a divergência
+    (armazenado - calculado) de cada total. Com fix=True grava os valores
+    corretos no shard 0 e zera os demais (criando os que faltarem).
+    """
+    with transaction.atomic():
+        # trava todas as linhas, sempre na mesma ordem
+        stored = list(InventoryTotals.objects.select_for_update().order_by('shard'))
+        computed = compute_totals()
+        drift = {
+            key: sum(getattr(row, key) for row in stored) - value
+            for key, value in computed.items()
+        }
+        if fix:
+            InventoryTotals.objects.bulk_create(
+                [InventoryTotals(shard=shard) for shard in range(SHARDS)],
+                ignore_conflicts=True,
+            )
+            InventoryTotals.objects.filter(shard=0).update(updated_at=timezone.now(), **computed)
+            InventoryTotals.objects.exclude(shard=0).update(
+                total_quantity=0, total_cost_value=0, total_selling_value=0,
+            )
+    return drift
+
+
+def get_totals():
+    """
+    Totais do estoque (soma dos shards, uma consulta), com os mesmos
+    atributos de InventoryTotals; cria as linhas na primeira chamada.
+    """
+    totals = sum_shards(InventoryTotals.objects.all())
+    if totals.pop('shards') < SHARDS:
+        reconcile()
+        totals = sum_shards(InventoryTotals.objects.all())
+        totals.pop('shards')
+    return InventoryTotals(**totals)